@@ -8,7 +8,7 @@ import logging
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from kgqa_framework import FaultAnalyzer
+from kgqa_framework import get_fault_analyzer, reset_fault_analyzer
 from kgqa_framework.config import current_config
 from kgqa_framework.models.entities import EquipmentInfo, UserQuery
 
@@ -23,7 +23,7 @@ def init_analyzer():
     global analyzer
     if analyzer is None:
         try:
-            analyzer = FaultAnalyzer(
+            analyzer = get_fault_analyzer(
                 neo4j_uri=current_config.NEO4J_URI,
                 neo4j_username=current_config.NEO4J_USERNAME,
                 neo4j_password=current_config.NEO4J_PASSWORD,
@@ -31,7 +31,9 @@ def init_analyzer():
                 vectorizer_path=current_config.VECTORIZER_PATH,
                 stopwords_path=current_config.STOPWORDS_PATH,
                 custom_dict_path=current_config.CUSTOM_DICT_PATH,
-                enable_web_search=current_config.ENABLE_WEB_SEARCH
+                enable_web_search=current_config.ENABLE_WEB_SEARCH,
+                entity_batch_service_url=current_config.ENTITY_BATCH_SERVICE_URL,
+                enable_kg_warmup=current_config.ENABLE_KG_WARMUP
             )
             logger.info("KGQA故障分析器初始化成功")
         except Exception as e:
@@ -349,7 +351,8 @@ def shutdown_analyzer():
     global analyzer
     if analyzer:
         try:
-            analyzer.close()
+            # 实例由 get_fault_analyzer 共享，通过 reset_fault_analyzer 关闭并移出缓存
+            reset_fault_analyzer()
             analyzer = None
             logger.info("KGQA故障分析器已关闭")
         except Exception as e:
@@ -47,6 +47,20 @@ class CnnModel:
         y_pred_cls = self.session.run(self.model.y_pred_cls, feed_dict=feed_dict)
         return self.categories[y_pred_cls[0]]
 
+    def predict_batch(self, messages):
+        # 一次 session.run 完成整批预测，避免逐句调用 predict
+        if not messages:
+            return []
+        data = [[self.word_to_id[x] for x in unicode(message) if x in self.word_to_id] for message in messages]
+
+        feed_dict = {
+            self.model.input_x: kr.preprocessing.sequence.pad_sequences(data, self.config.seq_length),
+            self.model.keep_prob: 1.0
+        }
+
+        y_pred_cls = self.session.run(self.model.y_pred_cls, feed_dict=feed_dict)
+        return [self.categories[i] for i in y_pred_cls]
+
 
 if __name__ == '__main__':
     cnn_model = CnnModel()
@@ -0,0 +1,34 @@
+from functools import lru_cache
+from typing import List
+
+from neo4j import Driver, GraphDatabase
+
+__all__ = ["get_driver", "close_drivers"]
+
+# Every driver created by ``get_driver`` (the body only runs on a cache miss),
+# kept so ``close_drivers`` can release them.
+_DRIVERS: List[Driver] = []
+
+
+@lru_cache(maxsize=None)
+def get_driver(uri: str = "bolt://localhost:7687", user: str = "neo4j", password: str = "password",
+               max_connection_pool_size: int = 64) -> Driver:
+    """Return the process-wide Bolt driver for the given connection settings.
+
+    A driver owns a bounded connection pool and is thread-safe, so creating a
+    ``KnowledgeGraphQA`` per request costs no new sockets.
+    ``connection_acquisition_timeout`` makes callers wait for a free
+    connection under load instead of growing the pool.
+    """
+    driver = GraphDatabase.driver(uri, auth=(user, password),
+                                  max_connection_pool_size=max_connection_pool_size,
+                                  connection_acquisition_timeout=30)
+    _DRIVERS.append(driver)
+    return driver
+
+
+def close_drivers():
+    """Close every driver handed out by :func:`get_driver`; call on shutdown."""
+    get_driver.cache_clear()
+    while _DRIVERS:
+        _DRIVERS.pop().close()
@@ -1,14 +1,59 @@
-from typing import Any, Dict
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Tuple
 
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
+from ._driver import close_drivers
 from .qa import KnowledgeGraphQA
 
 app = FastAPI(title="Equipment Fault Diagnosis QA", version="0.1.0")
 
 kgqa = KnowledgeGraphQA()
 
+# ``KnowledgeGraphQA.answer`` blocks on Neo4j I/O; running it on a small pool
+# keeps the event loop free so concurrent requests overlap their queries.
+EXEC = ThreadPoolExecutor(max_workers=8)
+
+# Cached answers expire after ``ANSWER_TTL`` seconds so that knowledge loaded
+# with ``kgqa.build`` shows up without restarting the service.
+ANSWER_TTL = 600
+_ANSWER_CACHE: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_ANSWER_CACHE_MAX = 4096
+_ANSWER_LOCK = threading.Lock()
+
+def _cached_answer(question: str) -> Dict[str, Any]:
+    # Repeated questions are served from memory without touching Neo4j.
+    # The key is only stripped, not lower-cased: fault codes such as
+    # ``ALM401`` are matched case-sensitively in the graph.
+    now = time.monotonic()
+    with _ANSWER_LOCK:
+        entry = _ANSWER_CACHE.get(question)
+        if entry is not None and entry[0] > now:
+            _ANSWER_CACHE.move_to_end(question)
+            return entry[1]
+    result = kgqa.answer(question)
+    with _ANSWER_LOCK:
+        _ANSWER_CACHE[question] = (now + ANSWER_TTL, result)
+        _ANSWER_CACHE.move_to_end(question)
+        while len(_ANSWER_CACHE) > _ANSWER_CACHE_MAX:
+            _ANSWER_CACHE.popitem(last=False)
+    return result
+
+def clear_answer_cache():
+    """Drop every cached answer; call after loading new knowledge."""
+    with _ANSWER_LOCK:
+        _ANSWER_CACHE.clear()
+
+@app.on_event("shutdown")
+def _shutdown():
+    EXEC.shutdown(wait=False)
+    close_drivers()
+
 class QueryIn(BaseModel):
     question: str
 
@@ -17,8 +62,9 @@ class QueryOut(BaseModel):
     answers: Any
 
 @app.post("/qa", response_model=QueryOut)
-def qa_endpoint(in_payload: QueryIn):
+async def qa_endpoint(in_payload: QueryIn):
     if not in_payload.question.strip():
         raise HTTPException(status_code=400, detail="Question cannot be empty.")
-    result = kgqa.answer(in_payload.question)
-    return result
\ No newline at end of file
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(EXEC, _cached_answer, in_payload.question.strip())
+    return result
@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 from typing import Dict, List, Tuple
 
 # To reuse the existing CNN model and NER utilities that are already shipped with the original project
@@ -18,23 +19,22 @@ __all__ = [
     "parse_fault_text",
 ]
 
+_TOKEN_RE = re.compile(r"[，。.,;；\s]+")
+_SENT_RE = re.compile(r"[。！!？?;；]")
+_DIGIT_RE = re.compile(r"\d")
+
 def _simple_tokenize(text: str) -> List[str]:
     """Very light tokenizer for fallback mode."""
     # Split on punctuation and whitespace
-    tokens = re.split(r"[，。.,;；\s]+", text)
+    tokens = _TOKEN_RE.split(text)
     return [t for t in tokens if t]
 
 def _fallback_extract(tokens: List[str]) -> List[Tuple[str, str]]:
     """A very naive rule-based extractor used when the heavyweight model is unavailable."""
     # For demo purpose, we mark any token that contains a digit as a fault code,
     # otherwise we treat tokens longer than 4 as phenomenon.
-    res: List[Tuple[str, str]] = []
-    for tok in tokens:
-        if re.search(r"\d", tok):
-            res.append((tok, "FaultCode"))
-        else:
-            res.append((tok, "Phenomenon"))
-    return res
+    has_digit = _DIGIT_RE.search
+    return [(tok, "FaultCode" if has_digit(tok) else "Phenomenon") for tok in tokens]
 
 def extract_entities(text: str) -> List[Tuple[str, str]]:
     """Extract entities from raw fault description text.
@@ -66,6 +66,9 @@ def classify_sentences(sentences: List[str]) -> List[str]:
     can still work in demo mode.
     """
     if cnn_model is not None:
+        if hasattr(cnn_model, "predict_batch"):
+            # One forward pass for the whole question instead of one per sentence
+            return cnn_model.predict_batch(sentences)  # type: ignore
         return [cnn_model.predict(s) for s in sentences]  # type: ignore
     # Fallback: label all as "故障现象"
     return ["故障现象" for _ in sentences]
@@ -82,29 +85,42 @@ def parse_fault_text(text: str) -> Dict[str, List[str]]:
             "fault_codes": [...],
         }
     """
+    operations, phenomena, fault_codes = _parse_fault_text_cached(text)
+    # fresh lists on every call so callers can't mutate the cached entry
+    return {
+        "operations": list(operations),
+        "phenomena": list(phenomena),
+        "fault_codes": list(fault_codes),
+    }
+
+@lru_cache(maxsize=1024)
+def _parse_fault_text_cached(text: str) -> Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]:
+    """Memoized body of :func:`parse_fault_text` returning immutable tuples.
+
+    Users often resubmit the same question, and the CNN/NER models behind
+    ``classify_sentences``/``extract_entities`` are the expensive part.
+    """
     # 1) sentence segmentation – very rough, split on punctuation
-    sentences = [s for s in re.split(r"[。！!？?;；]", text) if s.strip()]
+    sentences = [s for s in _SENT_RE.split(text) if s.strip()]
 
     # 2) classification
     labels = classify_sentences(sentences)
 
-    operations: List[str] = []
-    phenomena: List[str] = []
-    fault_codes: List[str] = []
+    # dicts used as insertion-ordered sets: duplicates are dropped as they
+    # arrive and the output keeps first-seen order
+    operations: Dict[str, None] = {}
+    phenomena: Dict[str, None] = {}
+    fault_codes: Dict[str, None] = {}
 
     # 3) entity extraction per sentence
     for sent, label in zip(sentences, labels):
         ents = extract_entities(sent)
         for ent, ent_label in ents:
             if ent_label == "FaultCode" or "故障代码" in ent_label:
-                fault_codes.append(ent)
+                fault_codes[ent] = None
             elif label == "用户操作" or label == "操作" or label == "操作步骤":
-                operations.append(ent)
+                operations[ent] = None
             else:
-                phenomena.append(ent)
+                phenomena[ent] = None
 
-    return {
-        "operations": list(set(operations)),
-        "phenomena": list(set(phenomena)),
-        "fault_codes": list(set(fault_codes)),
-    }
\ No newline at end of file
+    return tuple(operations), tuple(phenomena), tuple(fault_codes)
@@ -1,20 +1,23 @@
-from typing import Dict, List
+import logging
+import threading
+from typing import Dict, List, Set
 
-from py2neo import Graph
+from neo4j import Driver
 
+from ._driver import get_driver
 from .extraction import parse_fault_text
 
 __all__ = ["KnowledgeGraphQA"]
 
+_NO_ANSWER = "未在图谱中检索到直接答案，请尝试修改描述或在线检索。"
+
+logger = logging.getLogger(__name__)
+
+# Drivers whose ``title`` indexes have already been checked; the schema DDL
+# runs once per driver rather than once per ``KnowledgeGraphQA``.
+_INDEXED_DRIVERS: Set[Driver] = set()
+_INDEX_LOCK = threading.Lock()
 
-def _deduplicate_keep_order(items: List[str]) -> List[str]:
-    seen = set()
-    out: List[str] = []
-    for i in items:
-        if i not in seen:
-            out.append(i)
-            seen.add(i)
-    return out
 
 class KnowledgeGraphQA:
     """Light-weight question answering module built on top of a Neo4j graph.
@@ -25,39 +28,94 @@ class KnowledgeGraphQA:
     and more sophisticated inference.
     """
 
-    def __init__(self, uri: str = "http://localhost:7474", user: str = "neo4j", password: str = "password"):
-        self.graph = Graph(uri, auth=(user, password))
+    # Labels matched by ``{title: ...}`` in the queries below.
+    INDEXED_LABELS = ("FaultCode", "Phenomenon", "Cause", "Solution")
+
+    def __init__(self, uri: str = "bolt://localhost:7687", user: str = "neo4j", password: str = "password",
+                 max_connection_pool_size: int = 50):
+        # Bolt is Neo4j's binary protocol; the driver is shared process-wide and
+        # keeps a connection pool, so every instance and concurrent caller (e.g.
+        # the FastAPI worker pool) reuses the same sockets.
+        self._driver = get_driver(uri, user, password, max_connection_pool_size)
+        self._ensure_indexes()
+
+    def close(self):
+        # The driver is shared with other instances; ``_driver.close_drivers``
+        # releases it at process shutdown.
+        self._driver = None
+
+    def _ensure_indexes(self):
+        # Turns every ``{title: ...}`` lookup into an index seek instead of a
+        # label scan. Labels loaded by ``KnowledgeGraphBuilder`` already carry a
+        # unique constraint on ``title``, which is backed by an index, so only
+        # the remaining labels get one. Failures (read-only user, server down)
+        # are logged and the queries simply run without the index.
+        with _INDEX_LOCK:
+            if self._driver in _INDEXED_DRIVERS:
+                return
+            with self._driver.session() as session:
+                try:
+                    constrained = {
+                        record["label"]
+                        for record in session.run(
+                            "SHOW CONSTRAINTS YIELD labelsOrTypes, properties, type "
+                            "WHERE type = 'UNIQUENESS' AND properties = ['title'] "
+                            "UNWIND labelsOrTypes AS label RETURN label"
+                        )
+                    }
+                except Exception as e:
+                    # CREATE INDEX IF NOT EXISTS below is still safe without this.
+                    logger.warning("Could not list constraints: %s", e)
+                    constrained = set()
+                for label in self.INDEXED_LABELS:
+                    if label in constrained:
+                        continue
+                    # One failing label must not leave the others unindexed.
+                    try:
+                        session.run("CREATE INDEX IF NOT EXISTS FOR (n:%s) ON (n.title)" % label).consume()
+                    except Exception as e:
+                        logger.warning("Could not create title index on %s, lookups will use a label scan: %s",
+                                       label, e)
+            # Checked once per driver either way; restarting retries the DDL.
+            _INDEXED_DRIVERS.add(self._driver)
 
     # ------------------------------------------------------------------
     # Core helpers – Cypher queries
     # ------------------------------------------------------------------
-    def _search_by_fault_code(self, codes: List[str]):
-        res = []
-        for code in codes:
-            data = self.graph.run(
-                """
-                MATCH (f:FaultCode {title: $code})-[:FJ]->(p:Phenomenon)<-[:CY]-(c:Cause)
-                OPTIONAL MATCH (c)-[:FS]->(s:Solution)
-                RETURN f.title as fault_code, p.title as phenomenon, c.title as cause, collect(s.title) as solutions
-                """,
-                code=code,
-            ).data()
-            res.extend(data)
-        return res
-
-    def _search_by_phenomenon(self, phenomena: List[str]):
-        res = []
-        for phe in phenomena:
-            data = self.graph.run(
+    def _search(self, codes: List[str], phenomena: List[str]) -> List[Dict]:
+        """Exact match on fault codes, falling back to a phenomenon search.
+
+        Both steps run in one round-trip: the phenomenon subquery only
+        unwinds its input when the fault-code subquery found nothing. Rows are
+        grouped per (phenomenon, cause) with distinct solution titles, so the
+        answers come back already de-duplicated.
+        """
+        with self._driver.session() as session:
+            record = session.run(
                 """
-                MATCH (p:Phenomenon {title: $phe})<-[:CY]-(c:Cause)
-                OPTIONAL MATCH (c)-[:FS]->(s:Solution)
-                RETURN p.title as phenomenon, c.title as cause, collect(s.title) as solutions
+                CALL {
+                    UNWIND $codes AS code
+                    MATCH (f:FaultCode {title: code})-[:FJ]->(p:Phenomenon)<-[:CY]-(c:Cause)
+                    WITH p, c, head(collect(f.title)) AS fault_code
+                    OPTIONAL MATCH (c)-[:FS]->(s:Solution)
+                    WITH fault_code, p.title AS phenomenon, c.title AS cause, collect(DISTINCT s.title) AS solutions
+                    RETURN collect({fault_code: fault_code, phenomenon: phenomenon, cause: cause, solutions: solutions}) AS by_code
+                }
+                CALL {
+                    WITH by_code
+                    UNWIND CASE WHEN size(by_code) = 0 THEN $phenomena ELSE [] END AS phe
+                    MATCH (p:Phenomenon {title: phe})<-[:CY]-(c:Cause)
+                    WITH DISTINCT p, c
+                    OPTIONAL MATCH (c)-[:FS]->(s:Solution)
+                    WITH p.title AS phenomenon, c.title AS cause, collect(DISTINCT s.title) AS solutions
+                    RETURN collect({phenomenon: phenomenon, cause: cause, solutions: solutions}) AS by_phenomenon
+                }
+                RETURN by_code + by_phenomenon AS answers
                 """,
-                phe=phe,
-            ).data()
-            res.extend(data)
-        return res
+                codes=codes,
+                phenomena=phenomena,
+            ).single()
+        return record["answers"] if record else []
 
     # ------------------------------------------------------------------
     # Public interface
@@ -66,29 +124,18 @@ class KnowledgeGraphQA:
         """Main entry point used by external callers."""
         parsed = parse_fault_text(raw_question)
 
-        aggregates: List[Dict] = []
-
-        # 1) exact match on fault codes (highest precision)
-        if parsed["fault_codes"]:
-            aggregates.extend(self._search_by_fault_code(parsed["fault_codes"]))
+        # Nothing to look up: skip the Neo4j round-trip entirely.
+        if not parsed["fault_codes"] and not parsed["phenomena"]:
+            return {"query_parse": parsed, "answers": _NO_ANSWER}
 
-        # 2) fallback to phenomenon search
-        if not aggregates and parsed["phenomena"]:
-            aggregates.extend(self._search_by_phenomenon(parsed["phenomena"]))
+        # Exact match on fault codes (highest precision), falling back to
+        # phenomenon search when no code matched; duplicates are already
+        # collapsed by the query.
+        answers = self._search(parsed["fault_codes"], parsed["phenomena"])
 
         # NOTE: For a demo we skip operation-based reasoning.
 
-        # Post-processing – flatten duplicates
-        unique_seen = set()
-        cleaned: List[Dict] = []
-        for item in aggregates:
-            key = (item.get("phenomenon"), item.get("cause"))
-            if key not in unique_seen:
-                unique_seen.add(key)
-                item["solutions"] = _deduplicate_keep_order(item.get("solutions", []))
-                cleaned.append(item)
-
         return {
             "query_parse": parsed,
-            "answers": cleaned or "未在图谱中检索到直接答案，请尝试修改描述或在线检索。",
+            "answers": answers or _NO_ANSWER,
         }
\ No newline at end of file
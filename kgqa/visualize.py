@@ -1,49 +1,45 @@
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List, Union
 
-from py2neo import Graph
+if TYPE_CHECKING:  # only needed for the annotation; keeps ``import kgqa.visualize`` cheap
+    from neo4j import Session
+    from py2neo import Graph
 
 __all__ = ["graph_to_visjs"]
 
+# Kept as one constant text with ``LIMIT $limit`` bound at run time, so Neo4j
+# plans it once and reuses the cached plan for every limit value.
+_VISJS_QUERY = (
+    "MATCH (n)-[r]->(m) "
+    "WITH n, r, m LIMIT $limit "
+    "WITH collect({from: id(n), to: id(m), label: coalesce(r.type, type(r))}) AS edges, "
+    "     collect(n) + collect(m) AS ns "
+    "UNWIND ns AS x "
+    "WITH edges, collect(DISTINCT x) AS nodes "
+    "RETURN [x IN nodes | {id: id(x), label: x.title, group: coalesce(head(labels(x)), 'Entity')}] AS nodes, edges"
+)
 
-def graph_to_visjs(graph: Graph, limit: int = 100) -> Dict[str, List[Dict[str, Any]]]:
+
+def graph_to_visjs(graph: Union["Graph", "Session"], limit: int = 100) -> Dict[str, List[Dict[str, Any]]]:
     """Export a subgraph into a JSON structure consumable by Vis.js or Neovis.js.
 
+    Node de-duplication and payload shaping are done by Cypher, so the rows
+    returned are already in Vis.js form.
+
     Parameters
     ----------
-    graph : Graph
-        Active py2neo Graph connection.
+    graph : Graph or Session
+        Active py2neo Graph connection, or a neo4j driver Session, e.g. one
+        opened on the shared ``kgqa._driver.get_driver()``.
     limit : int, optional
         Maximum number of relationships to fetch.
     """
-    query = (
-        "MATCH (n)-[r]->(m) RETURN n, r, m LIMIT %d" % limit
-    )
-    data = graph.run(query).data()
-
-    nodes_seen = {}
-    edges = []
-
-    for row in data:
-        n = row["n"]
-        m = row["m"]
-        r = row["r"]
-
-        for node in [n, m]:
-            node_id = node.identity
-            if node_id not in nodes_seen:
-                nodes_seen[node_id] = {
-                    "id": node_id,
-                    "label": node["title"],
-                    "group": list(node.labels)[0] if node.labels else "Entity",
-                }
-
-        edges.append({
-            "from": n.identity,
-            "to": m.identity,
-            "label": r["type"] if "type" in r else "rel",
-        })
+    # The query aggregates to a single row; read it straight off the cursor
+    # instead of materialising ``.data()`` into an intermediate list of dicts.
+    record = next(iter(graph.run(_VISJS_QUERY, limit=limit)), None)
 
+    if record is None:
+        return {"nodes": [], "edges": []}
     return {
-        "nodes": list(nodes_seen.values()),
-        "edges": edges,
-    }
\ No newline at end of file
+        "nodes": record["nodes"],
+        "edges": record["edges"],
+    }
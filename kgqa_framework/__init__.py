@@ -6,7 +6,7 @@ Knowledge Graph based Question Answering Framework for Fault Diagnosis
 __version__ = "1.0.0"
 __author__ = "KGQA Team"
 
-from .core.fault_analyzer import FaultAnalyzer
+from .core.fault_analyzer import FaultAnalyzer, get_fault_analyzer, reset_fault_analyzer
 from .core.kg_engine import KnowledgeGraphEngine
 from .core.similarity_matcher import SimilarityMatcher
 from .core.solution_recommender import SolutionRecommender
@@ -15,6 +15,8 @@ from .utils.text_processor import TextProcessor
 
 __all__ = [
     'FaultAnalyzer',
+    'get_fault_analyzer',
+    'reset_fault_analyzer',
     'KnowledgeGraphEngine', 
     'SimilarityMatcher',
     'SolutionRecommender',
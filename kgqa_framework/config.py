@@ -31,6 +31,9 @@ class Config:
     MAX_SIMILAR_CASES = 5
     MIN_SIMILARITY_THRESHOLD = 0.1
     DEFAULT_CONFIDENCE_THRESHOLD = 0.7
+    ENABLE_KG_WARMUP = False  # 启动时预热Neo4j页缓存
+    # 批量实体识别接口（NER服务提供 /extract_entities_batch 时才配置，未配置时逐条调用）
+    ENTITY_BATCH_SERVICE_URL = os.getenv('ENTITY_BATCH_SERVICE_URL') or None
     
     # 日志配置
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -54,12 +57,16 @@ class Config:
     
     @classmethod
     def to_dict(cls) -> Dict[str, Any]:
-        """转换为字典格式"""
-        config_dict = {}
-        for attr_name in dir(cls):
-            if attr_name.isupper():
-                config_dict[attr_name] = getattr(cls, attr_name)
-        return config_dict
+        """转换为字典格式（每个配置类只遍历一次 dir()，之后返回缓存的副本）"""
+        # 只查本类的 __dict__，避免子类读到父类的缓存
+        config_dict = cls.__dict__.get('_dict_cache')
+        if config_dict is None:
+            config_dict = {}
+            for attr_name in dir(cls):
+                if attr_name.isupper():
+                    config_dict[attr_name] = getattr(cls, attr_name)
+            cls._dict_cache = config_dict
+        return config_dict.copy()
 
 
 class DevelopmentConfig(Config):
@@ -74,6 +81,7 @@ class ProductionConfig(Config):
     DEBUG = False
     LOG_LEVEL = 'WARNING'
     ENABLE_WEB_SEARCH = False  # 生产环境可能需要禁用网络搜索
+    ENABLE_KG_WARMUP = True
 
 
 class TestingConfig(Config):
@@ -2,13 +2,15 @@
 核心组件包
 """
 
-from .fault_analyzer import FaultAnalyzer
+from .fault_analyzer import FaultAnalyzer, get_fault_analyzer, reset_fault_analyzer
 from .kg_engine import KnowledgeGraphEngine  
 from .similarity_matcher import SimilarityMatcher
 from .solution_recommender import SolutionRecommender
 
 __all__ = [
     'FaultAnalyzer',
+    'get_fault_analyzer',
+    'reset_fault_analyzer',
     'KnowledgeGraphEngine',
     'SimilarityMatcher', 
     'SolutionRecommender'
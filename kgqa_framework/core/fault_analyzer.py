@@ -3,9 +3,15 @@
 整合文本处理、知识图谱推理、相似案例匹配和解决方案推荐的核心组件
 """
 
+import asyncio
+import copy
+import functools
 import logging
-from typing import Optional, Dict, Any
-from ..models.entities import UserQuery, DiagnosisResult, EquipmentInfo
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+from ..models.entities import UserQuery, DiagnosisResult, EquipmentInfo, FaultElement
+from ..utils.cache import TTLCache
 from ..utils.text_processor import TextProcessor
 from .kg_engine import KnowledgeGraphEngine
 from .similarity_matcher import SimilarityMatcher
@@ -25,7 +31,11 @@ class FaultAnalyzer:
                  custom_dict_path: str = None,
                  enable_web_search: bool = True,
                  entity_service_url: str = "http://127.0.0.1:50003/extract_entities",
-                 enable_entity_recognition: bool = True):
+                 enable_entity_recognition: bool = True,
+                 entity_batch_service_url: str = None,
+                 result_cache_size: int = 1024,
+                 result_cache_ttl: float = 600,
+                 enable_kg_warmup: bool = False):
         """
         初始化故障分析器
         
@@ -40,9 +50,25 @@ class FaultAnalyzer:
             enable_web_search: 是否启用网络搜索
             entity_service_url: 实体识别服务URL
             enable_entity_recognition: 是否启用实体识别
+            entity_batch_service_url: 批量实体识别接口URL，未配置时逐条调用实体识别服务
+            result_cache_size: 诊断结果缓存的最大条目数
+            result_cache_ttl: 诊断结果缓存的有效期（秒）
+            enable_kg_warmup: 是否在初始化时预热知识图谱（生产环境建议开启）
         """
         self.logger = logging.getLogger(__name__)
         
+        # 诊断结果缓存：重复的查询直接返回，不再走完整的分析流程
+        self._result_cache = TTLCache(maxsize=result_cache_size, ttl=result_cache_ttl)
+        
+        # 系统状态缓存：健康检查频繁调用时不必每次都统计案例库、测试数据库连接
+        self._status_cache = TTLCache(maxsize=1, ttl=5)
+        
+        # (故障描述, 相关现象) -> 已提取的故障元素，用户反馈时复用，避免再次调用实体识别
+        self._elements_cache = TTLCache(maxsize=result_cache_size, ttl=result_cache_ttl)
+        
+        # 相似案例匹配只依赖用户查询，放到线程池中与文本分析、图谱推理并行执行
+        self._pool = ThreadPoolExecutor(max_workers=4)
+        
         # 初始化各个组件
         try:
             # 文本处理器
@@ -50,7 +76,8 @@ class FaultAnalyzer:
                 stopwords_path=stopwords_path,
                 custom_dict_path=custom_dict_path,
                 entity_service_url=entity_service_url,
-                enable_entity_recognition=enable_entity_recognition
+                enable_entity_recognition=enable_entity_recognition,
+                entity_batch_service_url=entity_batch_service_url
             )
             
             # 知识图谱引擎
@@ -59,6 +86,8 @@ class FaultAnalyzer:
                 username=neo4j_username,
                 password=neo4j_password
             )
+            if enable_kg_warmup:
+                self.kg_engine.warmup()
             
             # 相似度匹配器
             self.similarity_matcher = SimilarityMatcher(
@@ -99,73 +128,180 @@ class FaultAnalyzer:
         Returns:
             诊断结果
         """
-        try:
-            # 1. 构建用户查询对象
-            equipment_info = EquipmentInfo(
-                brand=brand,
-                model=model,
-                error_code=error_code
-            )
-            
-            user_query = UserQuery(
-                equipment_info=equipment_info,
-                fault_description=fault_description,
-                related_phenomena=related_phenomena or [],
-                user_feedback=user_feedback
-            )
+        # 1. 构建用户查询对象
+        equipment_info = EquipmentInfo(
+            brand=brand,
+            model=model,
+            error_code=error_code
+        )
+        
+        user_query = UserQuery(
+            equipment_info=equipment_info,
+            fault_description=fault_description,
+            related_phenomena=related_phenomena or [],
+            user_feedback=user_feedback
+        )
+        
+        return self.analyze_faults([user_query])[0]
+    
+    def analyze_faults(self, queries: List[UserQuery]) -> List[DiagnosisResult]:
+        """
+        批量分析故障
+        
+        所有查询的文本一次批量提取故障元素，图谱推理合并为一次查询，
+        相似案例一次向量化匹配；适合离线批量诊断。
+        
+        Args:
+            queries: 用户查询列表
             
-            # 2. 文本预处理和故障元素提取
+        Returns:
+            与 queries 一一对应的诊断结果
+        """
+        results = [None] * len(queries)
+        
+        try:
+            # 2. 文本预处理，命中诊断结果缓存的查询直接返回
             self.logger.info("开始文本分析...")
-            cleaned_description = self.text_processor.clean_text(fault_description)
-            sentences = self.text_processor.split_sentences(cleaned_description)
-            
-            # 提取故障元素
-            fault_elements = []
-            for sentence in sentences:
-                elements = self.text_processor.extract_fault_elements(sentence)
-                fault_elements.extend(elements)
-            
-            # 添加相关现象的故障元素
-            for phenomenon in related_phenomena or []:
-                phenomenon_elements = self.text_processor.extract_fault_elements(phenomenon)
-                fault_elements.extend(phenomenon_elements)
+            # 缓存键 -> (用户查询, 清理后的描述, 使用该结果的下标)，相同的查询只分析一次
+            pending = {}
+            for index, user_query in enumerate(queries):
+                equipment_info = user_query.equipment_info
+                cleaned_description = self.text_processor.clean_text(user_query.fault_description)
+                
+                cache_key = (
+                    cleaned_description, equipment_info.brand, equipment_info.model,
+                    equipment_info.error_code, tuple(sorted(user_query.related_phenomena or []))
+                )
+                cached_result = self._result_cache.get(cache_key)
+                if cached_result is not None:
+                    self.logger.info("命中诊断结果缓存")
+                    results[index] = copy.deepcopy(cached_result)
+                    continue
+                
+                pending.setdefault(cache_key, (user_query, cleaned_description, []))[2].append(index)
             
-            self.logger.info(f"提取到 {len(fault_elements)} 个故障元素")
+            if not pending:
+                return results
+            entries = list(pending.items())
             
-            # 3. 知识图谱推理
-            self.logger.info("开始知识图谱推理...")
-            kg_reasoning_result = self.kg_engine.execute_reasoning_chain(fault_elements)
-            
-            # 4. 相似案例匹配
+            # 4. 相似案例匹配（提前在后台启动，与后续的元素提取和图谱推理并行）
             self.logger.info("开始相似案例匹配...")
-            similar_cases = self.similarity_matcher.find_similar_cases(
-                query=user_query,
+            similar_cases_future = self._pool.submit(
+                self.similarity_matcher.find_similar_cases_batch,
+                queries=[user_query for _, (user_query, _, _) in entries],
                 top_k=5,
                 min_similarity=0.1
             )
             
+            # 提取故障元素（所有查询的分句和相关现象一次批量提取，记录每个查询对应的区间）
+            all_texts = []
+            spans = []
+            for _, (user_query, cleaned_description, _) in entries:
+                start = len(all_texts)
+                all_texts.extend(self.text_processor.split_sentences(cleaned_description))
+                all_texts.extend(user_query.related_phenomena or [])
+                spans.append((start, len(all_texts)))
+            extracted = self.text_processor.extract_fault_elements_batch(all_texts)
+            
+            fault_element_lists = []
+            for (_, (user_query, _, _)), (start, end) in zip(entries, spans):
+                # 同一元素常在多个分句中重复出现，按 (类型, 内容) 去重，保留首次出现的元素
+                unique_elements = {}
+                for elements in extracted[start:end]:
+                    for element in elements:
+                        unique_elements.setdefault((element.element_type, element.content), element)
+                fault_elements = list(unique_elements.values())
+                
+                self._elements_cache.set(self._elements_cache_key(user_query), fault_elements)
+                fault_element_lists.append(fault_elements)
+            self.logger.info(f"提取到 {sum(map(len, fault_element_lists))} 个故障元素")
+            
+            # 3. 知识图谱推理（所有查询合并为一次批量推理）
+            self.logger.info("开始知识图谱推理...")
+            kg_reasoning_results = self.kg_engine.execute_reasoning_chains(fault_element_lists)
+            
+            # 等待相似案例匹配结果
+            similar_cases_lists = similar_cases_future.result()
+            
             # 5. 生成综合推荐结果
             self.logger.info("生成解决方案推荐...")
-            diagnosis_result = self.solution_recommender.generate_recommendations(
-                kg_reasoning_result=kg_reasoning_result,
-                similar_cases=similar_cases,
-                user_query=user_query,
-                fault_elements=fault_elements
-            )
+            for (cache_key, (user_query, _, indices)), fault_elements, kg_reasoning_result, similar_cases in zip(
+                    entries, fault_element_lists, kg_reasoning_results, similar_cases_lists):
+                diagnosis_result = self.solution_recommender.generate_recommendations(
+                    kg_reasoning_result=kg_reasoning_result,
+                    similar_cases=similar_cases,
+                    user_query=user_query,
+                    fault_elements=fault_elements
+                )
+                
+                # 缓存副本，避免调用方修改返回结果后影响缓存
+                self._result_cache.set(cache_key, copy.deepcopy(diagnosis_result))
+                results[indices[0]] = diagnosis_result
+                for index in indices[1:]:
+                    results[index] = copy.deepcopy(diagnosis_result)
             
             self.logger.info("故障分析完成")
-            return diagnosis_result
             
         except Exception as e:
             self.logger.error(f"故障分析失败: {e}")
-            return DiagnosisResult(
-                causes=["分析过程出现错误"],
-                solutions=["请检查输入信息或联系技术支持"],
-                confidence=0.0,
-                reasoning_path=[],
-                similar_cases=[],
-                recommendations=["建议重新描述故障现象"]
+            # 批量分析失败时逐条重试未完成的查询，一条异常输入不影响同批的其他查询
+            # （单条查询失败时直接返回错误结果，不会继续递归）
+            if len(queries) > 1:
+                for index, user_query in enumerate(queries):
+                    if results[index] is None:
+                        results[index] = self.analyze_faults([user_query])[0]
+        
+        return [result if result is not None else self._error_result() for result in results]
+    
+    @staticmethod
+    def _elements_cache_key(user_query: UserQuery) -> Tuple:
+        """故障元素缓存键：提取的元素同时来自故障描述和相关现象，两者都要计入"""
+        return (user_query.fault_description, tuple(user_query.related_phenomena or []))
+    
+    @staticmethod
+    def _error_result() -> DiagnosisResult:
+        """分析失败时返回的诊断结果"""
+        return DiagnosisResult(
+            causes=["分析过程出现错误"],
+            solutions=["请检查输入信息或联系技术支持"],
+            confidence=0.0,
+            reasoning_path=[],
+            similar_cases=[],
+            recommendations=["建议重新描述故障现象"]
+        )
+    
+    async def analyze_fault_async(self,
+                                  fault_description: str,
+                                  brand: str = None,
+                                  model: str = None,
+                                  error_code: str = None,
+                                  related_phenomena: list = None,
+                                  user_feedback: str = None) -> DiagnosisResult:
+        """
+        analyze_fault 的异步版本，供异步Web框架调用
+        
+        分析在事件循环的默认线程池中执行，不阻塞事件循环；不使用 self._pool，
+        因为 analyze_fault 内部还会向 self._pool 提交相似案例匹配，共用会在线程池占满时互相等待。
+        
+        Args:
+            与 analyze_fault 相同
+            
+        Returns:
+            诊断结果
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            functools.partial(
+                self.analyze_fault,
+                fault_description=fault_description,
+                brand=brand,
+                model=model,
+                error_code=error_code,
+                related_phenomena=related_phenomena,
+                user_feedback=user_feedback
             )
+        )
     
     def analyze_fault_from_query(self, user_query: UserQuery) -> DiagnosisResult:
         """
@@ -186,6 +322,10 @@ class FaultAnalyzer:
             user_feedback=user_query.user_feedback
         )
     
+    def clear_result_cache(self):
+        """清空诊断结果缓存（案例库、解决方案库或知识图谱更新后调用）"""
+        self._result_cache.clear()
+    
     def get_system_status(self) -> Dict[str, Any]:
         """
         获取系统状态信息
@@ -193,6 +333,10 @@ class FaultAnalyzer:
         Returns:
             系统状态字典
         """
+        cached_status = self._status_cache.get("status")
+        if cached_status is not None:
+            return copy.deepcopy(cached_status)
+        
         status = {
             "kg_engine": {
                 "connected": False,
@@ -224,12 +368,14 @@ class FaultAnalyzer:
         except Exception as e:
             status["similarity_matcher"]["error"] = str(e)
         
+        self._status_cache.set("status", copy.deepcopy(status))
         return status
     
     def add_user_feedback(self, 
                          user_query: UserQuery, 
                          chosen_solution: str, 
-                         effectiveness_score: float):
+                         effectiveness_score: float,
+                         fault_elements: Optional[List[FaultElement]] = None):
         """
         添加用户反馈
         
@@ -237,6 +383,7 @@ class FaultAnalyzer:
             user_query: 原始用户查询
             chosen_solution: 用户选择的解决方案
             effectiveness_score: 有效性评分 (0-1)
+            fault_elements: 分析时已提取的故障元素，不传则复用最近一次分析的结果
         """
         try:
             # 更新解决方案推荐器
@@ -246,35 +393,44 @@ class FaultAnalyzer:
             
             # 如果反馈积极，可以考虑将其添加为新的案例
             if effectiveness_score >= 0.8:
-                self._add_successful_case(user_query, chosen_solution)
+                self._add_successful_case(user_query, chosen_solution, fault_elements)
+            
+            # 推荐器的反馈统计已变化，缓存的诊断结果不再准确
+            self.clear_result_cache()
             
             self.logger.info(f"用户反馈已记录：评分 {effectiveness_score}")
             
         except Exception as e:
             self.logger.error(f"记录用户反馈失败: {e}")
     
-    def _add_successful_case(self, user_query: UserQuery, solution: str):
+    def _add_successful_case(self, user_query: UserQuery, solution: str,
+                             fault_elements: Optional[List[FaultElement]] = None):
         """添加成功案例到案例库"""
         try:
-            from ..models.entities import SimilarCase, FaultElement, FaultType
+            from ..models.entities import SimilarCase
             import uuid
             
-            # 提取故障元素
-            fault_elements = self.text_processor.extract_fault_elements(
-                user_query.fault_description
-            )
+            # 优先使用分析时已提取的故障元素，都没有时才重新提取
+            if fault_elements is None:
+                fault_elements = self._elements_cache.get(self._elements_cache_key(user_query))
+            if fault_elements is None:
+                fault_elements = self.text_processor.extract_fault_elements(
+                    user_query.fault_description
+                )
             
             # 创建新案例
             new_case = SimilarCase(
                 case_id=str(uuid.uuid4()),
                 description=user_query.fault_description,
                 similarity=1.0,  # 新案例默认相似度
-                elements=fault_elements,
+                elements=list(fault_elements),
                 solution=solution
             )
             
             # 添加到相似度匹配器
             self.similarity_matcher.add_case(new_case)
+            self.clear_result_cache()
+            self._status_cache.clear()
             
             self.logger.info("成功案例已添加到案例库")
             
@@ -304,6 +460,8 @@ class FaultAnalyzer:
         """
         try:
             self.solution_recommender.update_solution_database(new_solutions)
+            self.clear_result_cache()
+            self._status_cache.clear()
             self.logger.info("解决方案数据库已更新")
         except Exception as e:
             self.logger.error(f"更新解决方案数据库失败: {e}")
@@ -325,6 +483,12 @@ class FaultAnalyzer:
             # 关闭数据库连接
             self.kg_engine.close()
             
+            # 关闭实体识别服务的HTTP连接
+            self.text_processor.close()
+            
+            # 关闭线程池
+            self._pool.shutdown(wait=True)
+            
             self.logger.info("故障分析器已关闭")
             
         except Exception as e:
@@ -336,4 +500,56 @@ class FaultAnalyzer:
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """上下文管理器出口"""
-        self.close()
\ No newline at end of file
+        self.close()
+
+
+# get_fault_analyzer 创建的共享实例，键为构造参数。不设上限也不淘汰：调用方
+# （如 Django 视图）会长期持有实例，淘汰时关闭会让仍在使用的实例失效
+_ANALYZERS: Dict[Tuple, FaultAnalyzer] = {}
+_ANALYZERS_LOCK = threading.Lock()
+
+
+def get_fault_analyzer(neo4j_uri: str,
+                       neo4j_username: str,
+                       neo4j_password: str,
+                       **kwargs) -> FaultAnalyzer:
+    """
+    获取共享的故障分析器实例
+    
+    相同参数的调用返回同一个实例，Neo4j驱动、向量化器和案例库只初始化一次，
+    适合在Web请求处理函数中调用。参数构成缓存键，必须可哈希
+    （字典参数请转换为 tuple(sorted(d.items()))）。
+    每种配置保留一个实例直到 reset_fault_analyzer；
+    实例在多个请求间共享，调用方不应关闭它，需要释放时调用 reset_fault_analyzer。
+    
+    Args:
+        neo4j_uri: Neo4j数据库URI
+        neo4j_username: Neo4j用户名
+        neo4j_password: Neo4j密码
+        **kwargs: 传给 FaultAnalyzer 的其他参数
+        
+    Returns:
+        故障分析器实例
+    """
+    key = (neo4j_uri, neo4j_username, neo4j_password, tuple(sorted(kwargs.items())))
+    with _ANALYZERS_LOCK:
+        analyzer = _ANALYZERS.get(key)
+        if analyzer is None:
+            # 在锁内创建，避免并发的首次请求各自创建一个实例
+            analyzer = FaultAnalyzer(
+                neo4j_uri=neo4j_uri,
+                neo4j_username=neo4j_username,
+                neo4j_password=neo4j_password,
+                **kwargs
+            )
+            _ANALYZERS[key] = analyzer
+        return analyzer
+
+
+def reset_fault_analyzer():
+    """关闭并清除所有共享的故障分析器实例（用于测试、重新加载配置或应用关闭）"""
+    with _ANALYZERS_LOCK:
+        analyzers = list(_ANALYZERS.values())
+        _ANALYZERS.clear()
+    for analyzer in analyzers:
+        analyzer.close()
@@ -4,18 +4,106 @@
 """
 
 from typing import List, Dict, Any, Optional, Tuple
-from neo4j import GraphDatabase
+from neo4j import GraphDatabase, READ_ACCESS
+import copy
 import logging
+import re
+import threading
+import time
+from functools import lru_cache
+from types import MappingProxyType
 from ..models.entities import (
     KnowledgeGraphNode, KnowledgeGraphRelation, 
     FaultElement, FaultType
 )
+from ..utils.cache import TTLCache
+
+# 纯汉字的词（全文索引默认分析器中每个汉字单独成词）
+_HAN_RE = re.compile(r"[\u4e00-\u9fff]+")
+
+
+@lru_cache(maxsize=16)
+def _paths_query(max_depth: int) -> str:
+    """路径查询语句（变长关系的深度不能参数化，按深度缓存生成的语句）"""
+    return f"""
+            MATCH path = (start {{title: $start_title}})-[*1..{int(max_depth)}]-(end {{title: $end_title}})
+            RETURN path
+            LIMIT 10
+            """
+
+
+@lru_cache(maxsize=64)
+def _nodes_by_content_query(labels: Tuple[str, ...]) -> str:
+    """
+    按 title 子串查找节点的语句
+    
+    标签谓词写入语句文本（n:A OR n:B），规划器才能按标签扫描；
+    按排序后的标签元组缓存生成的语句，相同的标签组合复用同一执行计划。
+    """
+    if labels:
+        label_filter = " OR ".join("n:`%s`" % label.replace("`", "``") for label in labels)
+        where = f"({label_filter}) AND n.title CONTAINS $content"
+    else:
+        where = "n.title CONTAINS $content"
+    return f"""
+            MATCH (n) 
+            WHERE {where}
+            RETURN n, labels(n) as labels
+            """
+
+
+# find_related_nodes 各方向的关系模式，{types} 处填入关系类型
+_RELATED_PATTERNS = {
+    "outgoing": "-[r{types}]->",
+    "incoming": "<-[r{types}]-",
+    "both": "-[r{types}]-",
+}
+
+
+@lru_cache(maxsize=64)
+def _related_nodes_query(direction: str, rel_types: Tuple[str, ...]) -> str:
+    """
+    查找相关节点的语句
+    
+    关系类型写入模式文本（-[r:XY|XX]->），只展开指定类型的关系；
+    按方向和排序后的类型元组缓存生成的语句，相同的组合复用同一执行计划。
+    """
+    types = ""
+    if rel_types:
+        types = ":" + "|".join("`%s`" % rel_type.replace("`", "``") for rel_type in rel_types)
+    pattern = _RELATED_PATTERNS.get(direction, _RELATED_PATTERNS["both"]).format(types=types)
+    return f"""
+            MATCH (n {{title: $title}}){pattern}(m)
+            RETURN m, labels(m) as labels, type(r) as relation_type
+            """
 
 
 class KnowledgeGraphEngine:
     """知识图谱引擎"""
     
-    def __init__(self, uri: str, username: str, password: str):
+    # 关系类型映射（只读，所有实例共享）
+    RELATION_TYPES = MappingProxyType({
+        'CX': '操作导致现象',    # 操作 -> 现象
+        'XY': '现象导致原因',    # 现象 -> 原因
+        'XX': '现象关联现象',    # 现象 -> 现象
+        'XB': '现象关联部位',    # 现象 -> 部位
+        'XJ': '现象关联报警'     # 现象 -> 报警
+    })
+    
+    # 覆盖按 title 模糊查找的节点类型的全文索引
+    FULLTEXT_INDEX = "titleIdx"
+    FULLTEXT_LABELS = ("Xianxiang", "Caozuo", "GuzhangBuwei", "Errorid")
+    
+    # 推理链涉及的节点类型（预热时扫描）
+    REASONING_LABELS = ("Xianxiang", "Yuanyin", "Caozuo", "GuzhangBuwei", "Errorid")
+    
+    def __init__(self, uri: str, username: str, password: str,
+                 max_connection_pool_size: int = 50,
+                 connection_acquisition_timeout: float = 30,
+                 cache_size: int = 4096,
+                 cache_ttl: float = 600,
+                 preload_cause_map: bool = True,
+                 cause_map_ttl: float = 600):
         """
         初始化知识图谱引擎
         
@@ -23,41 +111,328 @@ class KnowledgeGraphEngine:
             uri: Neo4j数据库URI
             username: 用户名
             password: 密码
+            max_connection_pool_size: Bolt连接池大小
+            connection_acquisition_timeout: 等待空闲连接的超时时间（秒）
+            cache_size: 推理查询结果缓存的最大条目数
+            cache_ttl: 推理查询结果缓存的有效期（秒）
+            preload_cause_map: 是否在启动时把 现象->原因 映射加载到内存
+            cause_map_ttl: 内存映射的有效期（秒），过期后下一次查找时重新加载，
+                其他进程（如 kgqa/build.py）写入图谱后最多经过该时间即可见
         """
-        self.driver = GraphDatabase.driver(uri, auth=(username, password))
+        self.driver = GraphDatabase.driver(
+            uri,
+            auth=(username, password),
+            max_connection_pool_size=max_connection_pool_size,
+            connection_acquisition_timeout=connection_acquisition_timeout
+        )
         self.logger = logging.getLogger(__name__)
         
-        # 关系类型映射
-        self.relation_types = {
-            'CX': '操作导致现象',    # 操作 -> 现象
-            'XY': '现象导致原因',    # 现象 -> 原因
-            'XX': '现象关联现象',    # 现象 -> 现象
-            'XB': '现象关联部位',    # 现象 -> 部位
-            'XJ': '现象关联报警'     # 现象 -> 报警
-        }
+        # 推理查询结果缓存，键为 (查询类型, 排序后的输入元组)
+        self._query_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        
+        # 全文索引可用时，操作/部位/报警的模糊查找先走索引，不再全量扫描节点
+        self._fulltext_ready = self._ensure_fulltext_index()
+        self._reasoning_query = self._build_reasoning_query()
+        
+        # 现象 -> 直接原因、现象 -> 关联现象 的只读内存映射；加载成功后即为完整答案，
+        # 只有未加载（关闭预加载或加载失败）时才查询数据库
+        self._direct_xy: Dict[str, Tuple[str, ...]] = {}
+        self._xx: Dict[str, Tuple[str, ...]] = {}
+        self._cause_map_loaded = False
+        self._cause_map_enabled = preload_cause_map
+        self._cause_map_ttl = cause_map_ttl
+        self._cause_map_expires_at = 0.0
+        self._cause_map_lock = threading.Lock()
+        if preload_cause_map:
+            self._preload_phenomenon_cause_map()
+        
+        # 关系类型映射（兼容原有属性名）
+        self.relation_types = self.RELATION_TYPES
     
     def close(self):
         """关闭数据库连接"""
         if self.driver:
             self.driver.close()
     
+    def _ensure_fulltext_index(self) -> bool:
+        """创建 title 全文索引（已存在则跳过）并等待其可用"""
+        labels = "|".join(self.FULLTEXT_LABELS)
+        try:
+            with self.driver.session() as session:
+                session.run(
+                    f"CREATE FULLTEXT INDEX {self.FULLTEXT_INDEX} IF NOT EXISTS "
+                    f"FOR (n:{labels}) ON EACH [n.title]"
+                ).consume()
+                session.run(
+                    "CALL db.awaitIndex($name, 30)", name=self.FULLTEXT_INDEX
+                ).consume()
+            return True
+        except Exception as e:
+            self.logger.warning(f"全文索引不可用，使用CONTAINS查询: {e}")
+            return False
+    
+    def _lookup_params(self, plural: str, var: str, terms: List[str]) -> Dict[str, Any]:
+        """
+        构造按 title 子串查找起点节点的参数（配合 _title_lookup_clause 使用）
+        
+        全文索引的默认分析器把连续的字母、数字切成一个词（如 ALM401），短语查询
+        找不到 title 中间的子串（401 匹配不到 ALM401），而每个汉字单独成词，
+        纯汉字的短语查询能找到所有包含该子串的 title。因此只有纯汉字的词走全文索引，
+        其余的词仍用 CONTAINS 扫描，结果与原有子串匹配一致。
+        """
+        indexed = [term for term in terms if self._fulltext_ready and _HAN_RE.fullmatch(term)]
+        indexed_set = set(indexed)
+        return {
+            plural: terms,
+            f"{var}_items": [{"term": term, "phrase": f'"{term}"'} for term in indexed],
+            f"{var}_scan": [term for term in terms if term not in indexed_set]
+        }
+    
+    def _title_lookup_clause(self, plural: str, var: str, alias: str, label: str,
+                             batched: bool = True) -> str:
+        """
+        生成按 title 子串查找起点节点的子句
+        
+        batched 为 True 时输入取自批量查询的当前行 q，否则取自查询参数；
+        全文索引可用时纯汉字的词先用索引取候选节点，其余的词扫描标签（见 _lookup_params）。
+        """
+        source = "q." if batched else "$"
+        imports = "WITH q" if batched else ""
+        if self._fulltext_ready:
+            return f"""
+            {imports}
+            CALL {{
+                {imports}
+                UNWIND {source}{var}_items AS item
+                CALL db.index.fulltext.queryNodes($index, item.phrase) YIELD node AS {alias}
+                WITH item.term AS {var}, {alias}
+                WHERE {alias}:{label} AND {alias}.title CONTAINS {var}
+                RETURN {var}, {alias}
+                UNION ALL
+                {imports}
+                UNWIND {source}{var}_scan AS {var}
+                MATCH ({alias}:{label})
+                WHERE {alias}.title CONTAINS {var}
+                RETURN {var}, {alias}
+            }}"""
+        return f"""
+            {imports}
+            UNWIND {source}{plural} AS {var}
+            MATCH ({alias}:{label})
+            WHERE {alias}.title CONTAINS {var}"""
+    
+    def _build_reasoning_query(self) -> str:
+        """
+        构造推理链的批量查询
+        
+        $queries 中每一行是一次推理的输入，owner 用于把结果对应回调用方。
+        前三个子查询分别由操作、部位、报警找到相关现象；最后一个子查询对
+        直接现象和三类相关现象统一查找原因，step 对应推理步骤，weight 为该步骤的置信度系数。
+        """
+        return f"""
+        UNWIND $queries AS q
+        CALL {{{self._title_lookup_clause("operations", "operation", "c", "Caozuo")}
+            MATCH (c)-[:CX]->(x:Xianxiang)
+            RETURN collect({{phenomenon: x.title, confidence: 0.9, related_operation: operation}}) AS operation_phenomena
+        }}
+        CALL {{{self._title_lookup_clause("locations", "location", "b", "GuzhangBuwei")}
+            MATCH (b)-[:XB]-(x:Xianxiang)
+            RETURN collect({{phenomenon: x.title, confidence: 0.8, related_location: location}}) AS location_phenomena
+        }}
+        CALL {{{self._title_lookup_clause("alarms", "alarm", "e", "Errorid")}
+            MATCH (e)-[:XJ]-(x:Xianxiang)
+            RETURN collect({{phenomenon: x.title, confidence: 0.9, related_alarm: alarm}}) AS alarm_phenomena
+        }}
+        CALL {{
+            WITH q, operation_phenomena, location_phenomena, alarm_phenomena
+            UNWIND [
+                [1, 1.0, q.phenomena],
+                [2, 0.8, [r IN operation_phenomena | r.phenomenon]],
+                [3, 0.7, [r IN location_phenomena | r.phenomenon]],
+                [4, 1.0, [r IN alarm_phenomena | r.phenomenon]]
+            ] AS source
+            UNWIND source[2] AS phenomenon
+            WITH DISTINCT source[0] AS step, source[1] AS weight, phenomenon
+            CALL {{
+                WITH phenomenon
+                MATCH (:Xianxiang {{title: phenomenon}})-[:XY]->(y:Yuanyin)
+                RETURN y.title as cause, 1.0 as confidence
+                UNION
+                WITH phenomenon
+                MATCH (:Xianxiang {{title: phenomenon}})-[:XX]->(:Xianxiang)-[:XY]->(y:Yuanyin)
+                RETURN y.title as cause, 0.8 as confidence
+            }}
+            RETURN collect({{
+                step: step, cause: cause, confidence: confidence * weight, related_phenomenon: phenomenon
+            }}) AS causes
+        }}
+        RETURN q.owner AS owner, operation_phenomena, location_phenomena, alarm_phenomena, causes
+        """
+    
+    def invalidate(self):
+        """清空推理查询缓存（图谱写入后调用）"""
+        self._query_cache.clear()
+    
+    def refresh_cache(self):
+        """重新加载 现象->原因 内存映射并清空推理查询缓存"""
+        if self._cause_map_enabled:
+            self._preload_phenomenon_cause_map()
+        self.invalidate()
+    
+    def _preload_phenomenon_cause_map(self) -> bool:
+        """
+        把 (:Xianxiang)-[:XY]->(:Yuanyin) 和 (:Xianxiang)-[:XX]->(:Xianxiang) 加载到内存
+        
+        映射每隔 cause_map_ttl 秒重新加载一次（见 _lookup_cause_map）。
+        
+        Returns:
+            是否加载成功（失败时保留原有映射；从未加载成功时查找回退到数据库）
+        """
+        # 无论成功与否都推迟下一次加载，数据库不可用时不会每次查找都重试
+        self._cause_map_expires_at = time.monotonic() + self._cause_map_ttl
+        try:
+            direct_xy = {
+                record["phenomenon"]: tuple(record["causes"])
+                for record in self._read(
+                    "MATCH (p:Xianxiang)-[:XY]->(y:Yuanyin) "
+                    "RETURN p.title AS phenomenon, collect(DISTINCT y.title) AS causes"
+                )
+            }
+            xx = {
+                record["phenomenon"]: tuple(record["related"])
+                for record in self._read(
+                    "MATCH (p:Xianxiang)-[:XX]->(x:Xianxiang) "
+                    "RETURN p.title AS phenomenon, collect(DISTINCT x.title) AS related"
+                )
+            }
+            self._direct_xy, self._xx = direct_xy, xx
+            self._cause_map_loaded = True
+            self.logger.info(f"加载了 {len(direct_xy)} 个现象的原因映射")
+            return True
+        except Exception as e:
+            self.logger.warning(f"加载现象原因映射失败，使用数据库查询: {e}")
+            return False
+    
+    def _lookup_cause_map(self, phenomena: List[str]) -> Optional[List[Dict]]:
+        """
+        从内存映射查找现象的原因（直接原因置信度1.0，经关联现象的原因0.8）
+        
+        映射包含全部 XY/XX 关系，映射中没有的现象即没有原因（NER提取的内容
+        常常与节点标题不完全一致，这类现象无需再查询数据库）。
+        
+        Returns:
+            原因列表；映射未加载时返回 None，由调用方查询数据库
+        """
+        # 映射过期时由一个线程重新加载，其他线程在加载期间继续使用旧映射
+        if (self._cause_map_enabled
+                and time.monotonic() >= self._cause_map_expires_at
+                and self._cause_map_lock.acquire(blocking=False)):
+            try:
+                if time.monotonic() >= self._cause_map_expires_at:
+                    self._preload_phenomenon_cause_map()
+            finally:
+                self._cause_map_lock.release()
+        
+        if not self._cause_map_loaded:
+            return None
+        
+        direct_xy, xx = self._direct_xy, self._xx
+        causes = []
+        seen = set()
+        
+        for phenomenon in phenomena:
+            candidates = [(cause, 1.0) for cause in direct_xy.get(phenomenon, ())]
+            candidates.extend(
+                (cause, 0.8)
+                for related in xx.get(phenomenon, ())
+                for cause in direct_xy.get(related, ())
+            )
+            # 与查询中的 UNION 一致：相同的 (现象, 原因, 置信度) 只保留一条
+            for cause, confidence in candidates:
+                key = (phenomenon, cause, confidence)
+                if key not in seen:
+                    seen.add(key)
+                    causes.append({
+                        "cause": cause,
+                        "confidence": confidence,
+                        "related_phenomenon": phenomenon
+                    })
+        
+        return causes
+    
+    def _get_cached(self, key: Tuple) -> Optional[List[Dict]]:
+        """读取缓存的查询结果，返回副本（调用方会修改其中的置信度）"""
+        cached = self._query_cache.get(key)
+        if cached is None:
+            return None
+        return [dict(item) for item in cached]
+    
+    def _set_cached(self, key: Tuple, items: List[Dict]):
+        """缓存查询结果的副本"""
+        self._query_cache.set(key, [dict(item) for item in items])
+    
+    def _read(self, query: str, **params) -> List[Any]:
+        """
+        在托管读事务中执行查询
+        
+        底层连接取自驱动的连接池；会话不是线程安全的，
+        因此每次查询开一个短会话，而不是在引擎上共享一个。
+        
+        Args:
+            query: 参数化的Cypher查询语句
+            **params: 查询参数
+            
+        Returns:
+            查询记录列表
+        """
+        with self.driver.session(default_access_mode=READ_ACCESS) as session:
+            return session.execute_read(lambda tx: list(tx.run(query, **params)))
+    
+    def warmup(self) -> bool:
+        """
+        预热Neo4j页缓存，避免首次查询从磁盘冷加载
+        
+        优先使用 apoc.warmup.run，APOC不可用时扫描推理链涉及的节点及其关系
+        
+        Returns:
+            是否预热成功
+        """
+        start = time.perf_counter()
+        try:
+            try:
+                self._read("CALL apoc.warmup.run(true, true, true)")
+                method = "apoc.warmup.run"
+            except Exception:
+                for label in self.REASONING_LABELS:
+                    # 读取属性和关系类型，确保对应的存储页被加载（count(n)只会命中计数存储）
+                    self._read(
+                        f"MATCH (n:{label}) OPTIONAL MATCH (n)-[r]-() "
+                        f"RETURN count(n.title) + count(type(r)) AS touched"
+                    )
+                method = "标签扫描"
+            self.logger.info(f"知识图谱预热完成（{method}），耗时 {time.perf_counter() - start:.2f}s")
+            return True
+        except Exception as e:
+            self.logger.warning(f"知识图谱预热失败: {e}")
+            return False
+    
     def test_connection(self) -> bool:
         """测试数据库连接"""
         try:
-            with self.driver.session() as session:
-                result = session.run("RETURN 1")
-                return result.single() is not None
+            return len(self._read("RETURN 1")) > 0
         except Exception as e:
             self.logger.error(f"数据库连接测试失败: {e}")
             return False
     
-    def find_nodes_by_content(self, content: str, node_types: List[str] = None) -> List[KnowledgeGraphNode]:
+    def find_nodes_by_content(self, content: str, node_types: List[str] = None,
+                              with_properties: bool = True) -> List[KnowledgeGraphNode]:
         """
         根据内容查找节点
         
         Args:
             content: 查找内容
             node_types: 节点类型列表
+            with_properties: 是否复制节点的全部属性（为 False 时 properties 为空字典）
             
         Returns:
             匹配的节点列表
@@ -65,43 +440,31 @@ class KnowledgeGraphEngine:
         nodes = []
         
         try:
-            with self.driver.session() as session:
-                # 构建查询语句
-                if node_types:
-                    label_filter = " OR ".join([f"n:{label}" for label in node_types])
-                    query = f"""
-                    MATCH (n) 
-                    WHERE ({label_filter}) AND n.title CONTAINS $content
-                    RETURN n, labels(n) as labels
-                    """
-                else:
-                    query = """
-                    MATCH (n) 
-                    WHERE n.title CONTAINS $content
-                    RETURN n, labels(n) as labels
-                    """
+            query = _nodes_by_content_query(tuple(sorted(set(node_types or ()))))
+            
+            result = self._read(query, content=content)
+            
+            for record in result:
+                node_data = record["n"]
+                labels = record["labels"]
                 
-                result = session.run(query, content=content)
+                # element_id 在客户端读取（Cypher 的 elementId() 只有 Neo4j 5 服务器支持）
+                node = KnowledgeGraphNode(
+                    id=str(node_data.element_id),
+                    label=node_data.get("title", ""),
+                    properties=dict(node_data) if with_properties else {},
+                    node_type=labels[0] if labels else "Unknown"
+                )
+                nodes.append(node)
                 
-                for record in result:
-                    node_data = record["n"]
-                    labels = record["labels"]
-                    
-                    node = KnowledgeGraphNode(
-                        id=str(node_data.element_id),
-                        label=node_data.get("title", ""),
-                        properties=dict(node_data),
-                        node_type=labels[0] if labels else "Unknown"
-                    )
-                    nodes.append(node)
-                    
         except Exception as e:
             self.logger.error(f"查找节点失败: {e}")
         
         return nodes
     
     def find_related_nodes(self, node_title: str, relation_types: List[str] = None, 
-                          direction: str = "both") -> List[Tuple[KnowledgeGraphNode, str]]:
+                          direction: str = "both",
+                          with_properties: bool = True) -> List[Tuple[KnowledgeGraphNode, str]]:
         """
         查找相关节点
         
@@ -109,6 +472,7 @@ class KnowledgeGraphEngine:
             node_title: 节点标题
             relation_types: 关系类型列表
             direction: 关系方向 ("outgoing", "incoming", "both")
+            with_properties: 是否复制节点的全部属性（为 False 时 properties 为空字典）
             
         Returns:
             (相关节点, 关系类型) 元组列表
@@ -116,39 +480,27 @@ class KnowledgeGraphEngine:
         related_nodes = []
         
         try:
-            with self.driver.session() as session:
-                # 构建查询语句
-                if direction == "outgoing":
-                    relation_pattern = "-[r]->"
-                elif direction == "incoming":
-                    relation_pattern = "<-[r]-"
-                else:
-                    relation_pattern = "-[r]-"
-                
-                if relation_types:
-                    relation_filter = "|".join(relation_types)
-                    relation_pattern = f"-[r:{relation_filter}]->"
-                
-                query = f"""
-                MATCH (n {{title: $title}}){relation_pattern}(m)
-                RETURN m, type(r) as relation_type, labels(m) as labels
-                """
+            # 指定关系类型时只查出边（与原有行为一致）
+            if relation_types:
+                direction = "outgoing"
+            
+            query = _related_nodes_query(direction, tuple(sorted(set(relation_types or ()))))
+            
+            result = self._read(query, title=node_title)
+            
+            for record in result:
+                node_data = record["m"]
+                relation_type = record["relation_type"]
+                labels = record["labels"]
                 
-                result = session.run(query, title=node_title)
+                node = KnowledgeGraphNode(
+                    id=str(node_data.element_id),
+                    label=node_data.get("title", ""),
+                    properties=dict(node_data) if with_properties else {},
+                    node_type=labels[0] if labels else "Unknown"
+                )
+                related_nodes.append((node, relation_type))
                 
-                for record in result:
-                    node_data = record["m"]
-                    relation_type = record["relation_type"]
-                    labels = record["labels"]
-                    
-                    node = KnowledgeGraphNode(
-                        id=str(node_data.element_id),
-                        label=node_data.get("title", ""),
-                        properties=dict(node_data),
-                        node_type=labels[0] if labels else "Unknown"
-                    )
-                    related_nodes.append((node, relation_type))
-                    
         except Exception as e:
             self.logger.error(f"查找相关节点失败: {e}")
         
@@ -170,41 +522,34 @@ class KnowledgeGraphEngine:
         paths = []
         
         try:
-            with self.driver.session() as session:
-                query = f"""
-                MATCH path = (start {{title: $start_title}})-[*1..{max_depth}]-(end {{title: $end_title}})
-                RETURN path
-                LIMIT 10
-                """
+            result = self._read(_paths_query(max_depth), start_title=start_title, end_title=end_title)
+            
+            for record in result:
+                path_data = record["path"]
+                path_info = []
                 
-                result = session.run(query, start_title=start_title, end_title=end_title)
+                # 解析路径中的节点和关系
+                nodes = path_data.nodes
+                relationships = path_data.relationships
                 
-                for record in result:
-                    path_data = record["path"]
-                    path_info = []
-                    
-                    # 解析路径中的节点和关系
-                    nodes = path_data.nodes
-                    relationships = path_data.relationships
+                for i, node in enumerate(nodes):
+                    path_info.append({
+                        "type": "node",
+                        "id": str(node.element_id),
+                        "title": node.get("title", ""),
+                        "properties": dict(node)
+                    })
                     
-                    for i, node in enumerate(nodes):
+                    if i < len(relationships):
+                        rel = relationships[i]
                         path_info.append({
-                            "type": "node",
-                            "id": str(node.element_id),
-                            "title": node.get("title", ""),
-                            "properties": dict(node)
+                            "type": "relationship",
+                            "relation_type": rel.type,
+                            "properties": dict(rel)
                         })
-                        
-                        if i < len(relationships):
-                            rel = relationships[i]
-                            path_info.append({
-                                "type": "relationship",
-                                "relation_type": rel.type,
-                                "properties": dict(rel)
-                            })
-                    
-                    paths.append(path_info)
-                    
+                
+                paths.append(path_info)
+                
         except Exception as e:
             self.logger.error(f"查找路径失败: {e}")
         
@@ -220,28 +565,44 @@ class KnowledgeGraphEngine:
         Returns:
             故障原因和置信度列表
         """
+        if not phenomena:
+            return []
+        
+        # 内存映射已加载时直接返回，未加载时才查询数据库
+        causes = self._lookup_cause_map(phenomena)
+        if causes is not None:
+            return causes
+        
         causes = []
+        cache_key = ("causes", tuple(sorted(phenomena)))
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            with self.driver.session() as session:
-                for phenomenon in phenomena:
-                    query = """
-                    MATCH (p:Xianxiang {title: $phenomenon})-[:XY]->(y:Yuanyin)
-                    RETURN y.title as cause, 1.0 as confidence
-                    UNION
-                    MATCH (p:Xianxiang {title: $phenomenon})-[:XX]->(x:Xianxiang)-[:XY]->(y:Yuanyin)
-                    RETURN y.title as cause, 0.8 as confidence
-                    """
-                    
-                    result = session.run(query, phenomenon=phenomenon)
+            # 整个列表作为一个参数传入，UNWIND 后一次往返完成全部查询
+            query = """
+            UNWIND $phenomena AS phenomenon
+            MATCH (p:Xianxiang {title: phenomenon})-[:XY]->(y:Yuanyin)
+            RETURN phenomenon, y.title as cause, 1.0 as confidence
+            UNION
+            UNWIND $phenomena AS phenomenon
+            MATCH (p:Xianxiang {title: phenomenon})-[:XX]->(x:Xianxiang)-[:XY]->(y:Yuanyin)
+            RETURN phenomenon, y.title as cause, 0.8 as confidence
+            """
+            
+            result = self._read(query, phenomena=phenomena)
+            
+            for record in result:
+                causes.append({
+                    "cause": record["cause"],
+                    "confidence": record["confidence"],
+                    "related_phenomenon": record["phenomenon"]
+                })
+            
+            # 只缓存成功的查询，异常时返回的部分结果不缓存
+            self._set_cached(cache_key, causes)
                     
-                    for record in result:
-                        causes.append({
-                            "cause": record["cause"],
-                            "confidence": record["confidence"],
-                            "related_phenomenon": phenomenon
-                        })
-                        
         except Exception as e:
             self.logger.error(f"查找故障原因失败: {e}")
         
@@ -258,25 +619,33 @@ class KnowledgeGraphEngine:
             相关现象列表
         """
         phenomena = []
+        if not operations:
+            return phenomena
+        
+        cache_key = ("operation_phenomena", tuple(sorted(operations)))
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            with self.driver.session() as session:
-                for operation in operations:
-                    query = """
-                    MATCH (c:Caozuo)-[:CX]->(x:Xianxiang)
-                    WHERE c.title CONTAINS $operation
-                    RETURN x.title as phenomenon, 0.9 as confidence
-                    """
-                    
-                    result = session.run(query, operation=operation)
+            query = f"""{self._title_lookup_clause("operations", "operation", "c", "Caozuo", batched=False)}
+            MATCH (c)-[:CX]->(x:Xianxiang)
+            RETURN operation, x.title as phenomenon, 0.9 as confidence
+            """
+            params = dict(self._lookup_params("operations", "operation", operations), index=self.FULLTEXT_INDEX)
+            
+            result = self._read(query, **params)
+            
+            for record in result:
+                phenomena.append({
+                    "phenomenon": record["phenomenon"],
+                    "confidence": record["confidence"],
+                    "related_operation": record["operation"]
+                })
+            
+            # 只缓存成功的查询，异常时返回的部分结果不缓存
+            self._set_cached(cache_key, phenomena)
                     
-                    for record in result:
-                        phenomena.append({
-                            "phenomenon": record["phenomenon"],
-                            "confidence": record["confidence"],
-                            "related_operation": operation
-                        })
-                        
         except Exception as e:
             self.logger.error(f"查找相关现象失败: {e}")
         
@@ -293,25 +662,33 @@ class KnowledgeGraphEngine:
             常见现象列表
         """
         phenomena = []
+        if not locations:
+            return phenomena
+        
+        cache_key = ("location_phenomena", tuple(sorted(locations)))
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            with self.driver.session() as session:
-                for location in locations:
-                    query = """
-                    MATCH (b:GuzhangBuwei)-[:XB]-(x:Xianxiang)
-                    WHERE b.title CONTAINS $location
-                    RETURN x.title as phenomenon, 0.8 as confidence
-                    """
-                    
-                    result = session.run(query, location=location)
+            query = f"""{self._title_lookup_clause("locations", "location", "b", "GuzhangBuwei", batched=False)}
+            MATCH (b)-[:XB]-(x:Xianxiang)
+            RETURN location, x.title as phenomenon, 0.8 as confidence
+            """
+            params = dict(self._lookup_params("locations", "location", locations), index=self.FULLTEXT_INDEX)
+            
+            result = self._read(query, **params)
+            
+            for record in result:
+                phenomena.append({
+                    "phenomenon": record["phenomenon"],
+                    "confidence": record["confidence"],
+                    "related_location": record["location"]
+                })
+            
+            # 只缓存成功的查询，异常时返回的部分结果不缓存
+            self._set_cached(cache_key, phenomena)
                     
-                    for record in result:
-                        phenomena.append({
-                            "phenomenon": record["phenomenon"],
-                            "confidence": record["confidence"],
-                            "related_location": location
-                        })
-                        
         except Exception as e:
             self.logger.error(f"查找部位现象失败: {e}")
         
@@ -328,30 +705,70 @@ class KnowledgeGraphEngine:
             相关现象列表
         """
         phenomena = []
+        if not alarms:
+            return phenomena
+        
+        cache_key = ("alarm_phenomena", tuple(sorted(alarms)))
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            with self.driver.session() as session:
-                for alarm in alarms:
-                    query = """
-                    MATCH (e:Errorid)-[:XJ]-(x:Xianxiang)
-                    WHERE e.title CONTAINS $alarm
-                    RETURN x.title as phenomenon, 0.9 as confidence
-                    """
-                    
-                    result = session.run(query, alarm=alarm)
+            query = f"""{self._title_lookup_clause("alarms", "alarm", "e", "Errorid", batched=False)}
+            MATCH (e)-[:XJ]-(x:Xianxiang)
+            RETURN alarm, x.title as phenomenon, 0.9 as confidence
+            """
+            params = dict(self._lookup_params("alarms", "alarm", alarms), index=self.FULLTEXT_INDEX)
+            
+            result = self._read(query, **params)
+            
+            for record in result:
+                phenomena.append({
+                    "phenomenon": record["phenomenon"],
+                    "confidence": record["confidence"],
+                    "related_alarm": record["alarm"]
+                })
+            
+            # 只缓存成功的查询，异常时返回的部分结果不缓存
+            self._set_cached(cache_key, phenomena)
                     
-                    for record in result:
-                        phenomena.append({
-                            "phenomenon": record["phenomenon"],
-                            "confidence": record["confidence"],
-                            "related_alarm": alarm
-                        })
-                        
         except Exception as e:
             self.logger.error(f"查找报警现象失败: {e}")
         
         return phenomena
     
+    @staticmethod
+    def _empty_reasoning_result() -> Dict[str, Any]:
+        """空的推理结果"""
+        return {
+            "causes": [],
+            "related_phenomena": [],
+            "reasoning_paths": [],
+            "confidence_scores": {}
+        }
+    
+    @staticmethod
+    def _group_fault_elements(fault_elements: List[FaultElement]) -> Tuple[List[str], ...]:
+        """
+        按类型分组故障元素
+        
+        一次遍历分发到各类型的集合，再排序（去重，重复内容不再进入查询参数）
+        
+        Returns:
+            (操作, 现象, 部位, 报警) 四个排序后的内容列表
+        """
+        groups = {
+            FaultType.OPERATION: set(),
+            FaultType.PHENOMENON: set(),
+            FaultType.LOCATION: set(),
+            FaultType.ALARM: set()
+        }
+        for elem in fault_elements:
+            group = groups.get(elem.element_type)
+            if group is not None:
+                group.add(elem.content)
+        return tuple(sorted(group) for group in groups.values())
+    
     def execute_reasoning_chain(self, fault_elements: List[FaultElement]) -> Dict[str, Any]:
         """
         执行推理链
@@ -362,59 +779,108 @@ class KnowledgeGraphEngine:
         Returns:
             推理结果
         """
-        reasoning_result = {
-            "causes": [],
-            "related_phenomena": [],
-            "reasoning_paths": [],
-            "confidence_scores": {}
-        }
+        return self.execute_reasoning_chains([fault_elements])[0]
+    
+    def execute_reasoning_chains(self, fault_element_lists: List[List[FaultElement]]) -> List[Dict[str, Any]]:
+        """
+        批量执行推理链，未命中缓存的输入合并为一次查询
+        
+        Args:
+            fault_element_lists: 每次推理的故障元素列表
+            
+        Returns:
+            与输入一一对应的推理结果
+        """
+        results = [None] * len(fault_element_lists)
+        # 缓存键 -> (分组后的输入, 使用该结果的下标)，相同的输入只查询一次
+        pending = {}
+        
+        for index, fault_elements in enumerate(fault_element_lists):
+            operations, phenomena, locations, alarms = groups = self._group_fault_elements(fault_elements)
+            
+            if not (operations or phenomena or locations or alarms):
+                results[index] = self._empty_reasoning_result()
+                continue
+            
+            # 只有现象时推理链只剩 现象->原因 一步，内存映射已加载则无需访问数据库
+            if not (operations or locations or alarms):
+                causes = self._lookup_cause_map(phenomena)
+                if causes is not None:
+                    results[index] = self._empty_reasoning_result()
+                    results[index]["causes"] = causes
+                    continue
+            
+            cache_key = ("reasoning_chain",) + tuple(tuple(group) for group in groups)
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                results[index] = copy.deepcopy(cached)
+                continue
+            
+            pending.setdefault(cache_key, (groups, []))[1].append(index)
         
-        # 按类型分组故障元素
-        operations = [elem.content for elem in fault_elements if elem.element_type == FaultType.OPERATION]
-        phenomena = [elem.content for elem in fault_elements if elem.element_type == FaultType.PHENOMENON]
-        locations = [elem.content for elem in fault_elements if elem.element_type == FaultType.LOCATION]
-        alarms = [elem.content for elem in fault_elements if elem.element_type == FaultType.ALARM]
-        
-        # 1. 根据现象直接查找原因
-        if phenomena:
-            direct_causes = self.get_fault_causes_by_phenomena(phenomena)
-            reasoning_result["causes"].extend(direct_causes)
-        
-        # 2. 根据操作查找相关现象，再查找原因
-        if operations:
-            operation_phenomena = self.get_related_phenomena_by_operations(operations)
-            reasoning_result["related_phenomena"].extend(operation_phenomena)
-            
-            # 基于操作相关现象查找原因
-            op_phenomenon_titles = [p["phenomenon"] for p in operation_phenomena]
-            indirect_causes = self.get_fault_causes_by_phenomena(op_phenomenon_titles)
-            for cause in indirect_causes:
-                cause["confidence"] *= 0.8  # 间接推理降低置信度
-            reasoning_result["causes"].extend(indirect_causes)
-        
-        # 3. 根据部位查找常见现象和原因
-        if locations:
-            location_phenomena = self.get_location_phenomena(locations)
-            reasoning_result["related_phenomena"].extend(location_phenomena)
-            
-            # 基于部位相关现象查找原因
-            loc_phenomenon_titles = [p["phenomenon"] for p in location_phenomena]
-            location_causes = self.get_fault_causes_by_phenomena(loc_phenomenon_titles)
-            for cause in location_causes:
-                cause["confidence"] *= 0.7  # 部位推理置信度更低
-            reasoning_result["causes"].extend(location_causes)
-        
-        # 4. 根据报警查找相关现象和原因
-        if alarms:
-            alarm_phenomena = self.get_alarm_phenomena(alarms)
-            reasoning_result["related_phenomena"].extend(alarm_phenomena)
-            
-            # 基于报警相关现象查找原因
-            alarm_phenomenon_titles = [p["phenomenon"] for p in alarm_phenomena]
-            alarm_causes = self.get_fault_causes_by_phenomena(alarm_phenomenon_titles)
-            reasoning_result["causes"].extend(alarm_causes)
-        
-        return reasoning_result
+        if pending:
+            entries = list(pending.items())
+            try:
+                self._run_reasoning_batch(entries, results)
+            except Exception as e:
+                self.logger.error(f"执行推理链失败: {e}")
+                # 批量查询失败时逐条重试，一条异常输入不影响同批的其他输入
+                if len(entries) > 1:
+                    for cache_key, (groups, indices) in entries:
+                        if results[indices[0]] is not None:
+                            continue
+                        try:
+                            self._run_reasoning_batch([(cache_key, (groups, indices))], results)
+                        except Exception as e:
+                            self.logger.error(f"执行推理链失败: {e}")
+        
+        return [result if result is not None else self._empty_reasoning_result() for result in results]
+    
+    def _run_reasoning_batch(self, entries: List[Tuple], results: List[Optional[Dict[str, Any]]]):
+        """
+        在一次往返中执行一批推理链，结果写入 results 并缓存
+        
+        整条推理链：
+        1. 现象 -> 原因
+        2. 操作 -> 现象 -> 原因（间接推理，置信度 ×0.8）
+        3. 部位 -> 现象 -> 原因（部位推理，置信度 ×0.7）
+        4. 报警 -> 现象 -> 原因
+        
+        Args:
+            entries: (缓存键, (分组后的输入, 使用该结果的下标)) 列表
+            results: 与原始输入一一对应的结果列表
+        """
+        queries = [
+            {
+                "owner": owner,
+                "phenomena": phenomena,
+                **self._lookup_params("operations", "operation", operations),
+                **self._lookup_params("locations", "location", locations),
+                **self._lookup_params("alarms", "alarm", alarms)
+            }
+            for owner, (_, ((operations, phenomena, locations, alarms), _)) in enumerate(entries)
+        ]
+        records = self._read(self._reasoning_query, queries=queries, index=self.FULLTEXT_INDEX)
+        
+        for record in records:
+            cache_key, (_, indices) = entries[record["owner"]]
+            reasoning_result = self._empty_reasoning_result()
+            reasoning_result["related_phenomena"] = (
+                list(record["operation_phenomena"])
+                + list(record["location_phenomena"])
+                + list(record["alarm_phenomena"])
+            )
+            
+            # 按推理步骤排序（稳定排序，保持步骤内的顺序）
+            causes = sorted((dict(cause) for cause in record["causes"]), key=lambda c: c["step"])
+            for cause in causes:
+                del cause["step"]
+            reasoning_result["causes"] = causes
+            
+            # 只缓存成功的查询
+            self._query_cache.set(cache_key, copy.deepcopy(reasoning_result))
+            for index in indices:
+                results[index] = copy.deepcopy(reasoning_result)
     
     def add_new_knowledge(self, fault_elements: List[FaultElement], 
                          solution: str, user_feedback: str) -> bool:
@@ -433,6 +899,8 @@ class KnowledgeGraphEngine:
             with self.driver.session() as session:
                 # 这里可以实现知识图谱的动态更新逻辑
                 # 暂时返回True，实际实现需要根据具体需求设计
+                # 图谱已变化，重新加载内存映射并清空缓存的推理结果
+                self.refresh_cache()
                 return True
         except Exception as e:
             self.logger.error(f"添加新知识失败: {e}")
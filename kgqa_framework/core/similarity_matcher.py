@@ -159,57 +159,82 @@ class SimilarityMatcher:
         Returns:
             相似案例列表
         """
-        if not self.cases or self.vectorizer is None or self.case_vectors is None:
-            return []
+        return self.find_similar_cases_batch([query], top_k=top_k, min_similarity=min_similarity)[0]
+    
+    def find_similar_cases_batch(self, 
+                                queries: List[UserQuery], 
+                                top_k: int = 5, 
+                                min_similarity: float = 0.1) -> List[List[SimilarCase]]:
+        """
+        批量查找相似案例，所有查询一次向量化，并用一次矩阵运算计算与案例的相似度
         
-        try:
-            # 准备查询文本
-            query_text_parts = [query.fault_description]
-            query_text_parts.extend(query.related_phenomena)
-            
-            # 添加设备信息
-            equipment_info = query.equipment_info
-            if equipment_info.brand:
-                query_text_parts.append(equipment_info.brand)
-            if equipment_info.model:
-                query_text_parts.append(equipment_info.model)
-            if equipment_info.error_code:
-                query_text_parts.append(equipment_info.error_code)
-            
-            # 清理和预处理查询文本
-            combined_query = " ".join(query_text_parts)
-            cleaned_query = self.text_processor.clean_text(combined_query)
-            
-            # 将查询转换为向量
-            query_vector = self.vectorizer.transform([cleaned_query])
-            
-            # 计算相似度
-            similarities = cosine_similarity(query_vector, self.case_vectors).flatten()
+        Args:
+            queries: 用户查询列表
+            top_k: 每个查询返回前k个最相似的案例
+            min_similarity: 最小相似度阈值
             
-            # 获取相似度排序的索引
-            similar_indices = np.argsort(similarities)[::-1]
+        Returns:
+            与 queries 一一对应的相似案例列表
+        """
+        if not queries or not self.cases or self.vectorizer is None or self.case_vectors is None:
+            return [[] for _ in queries]
+        
+        try:
+            # 将查询转换为向量（每个查询一行）
+            query_vectors = self.vectorizer.transform([self._query_text(query) for query in queries])
             
-            # 构建结果
-            similar_cases = []
-            for idx in similar_indices[:top_k]:
-                similarity = similarities[idx]
-                if similarity >= min_similarity:
-                    case = self.cases[idx]
-                    # 创建新的SimilarCase对象，更新相似度
-                    similar_case = SimilarCase(
-                        case_id=case.case_id,
-                        description=case.description,
-                        similarity=float(similarity),
-                        elements=case.elements.copy(),
-                        solution=case.solution
-                    )
-                    similar_cases.append(similar_case)
+            # 计算相似度矩阵：行对应查询，列对应案例
+            similarity_matrix = cosine_similarity(query_vectors, self.case_vectors)
             
-            return similar_cases
+            return [
+                self._top_similar_cases(similarities, top_k, min_similarity)
+                for similarities in similarity_matrix
+            ]
             
         except Exception as e:
             self.logger.error(f"查找相似案例失败: {e}")
-            return []
+            return [[] for _ in queries]
+    
+    def _query_text(self, query: UserQuery) -> str:
+        """组合故障描述、相关现象和设备信息，得到清理后的查询文本"""
+        query_text_parts = [query.fault_description]
+        query_text_parts.extend(query.related_phenomena)
+        
+        # 添加设备信息
+        equipment_info = query.equipment_info
+        if equipment_info.brand:
+            query_text_parts.append(equipment_info.brand)
+        if equipment_info.model:
+            query_text_parts.append(equipment_info.model)
+        if equipment_info.error_code:
+            query_text_parts.append(equipment_info.error_code)
+        
+        # 清理和预处理查询文本
+        combined_query = " ".join(query_text_parts)
+        return self.text_processor.clean_text(combined_query)
+    
+    def _top_similar_cases(self, similarities, top_k: int, min_similarity: float) -> List[SimilarCase]:
+        """根据一个查询与各案例的相似度，取出前k个达到阈值的案例"""
+        # 获取相似度排序的索引
+        similar_indices = np.argsort(similarities)[::-1]
+        
+        # 构建结果
+        similar_cases = []
+        for idx in similar_indices[:top_k]:
+            similarity = similarities[idx]
+            if similarity >= min_similarity:
+                case = self.cases[idx]
+                # 创建新的SimilarCase对象，更新相似度
+                similar_case = SimilarCase(
+                    case_id=case.case_id,
+                    description=case.description,
+                    similarity=float(similarity),
+                    elements=case.elements.copy(),
+                    solution=case.solution
+                )
+                similar_cases.append(similar_case)
+        
+        return similar_cases
     
     def calculate_element_similarity(self, 
                                    elements1: List[FaultElement], 
@@ -5,6 +5,7 @@
 
 import requests
 import logging
+from requests.adapters import HTTPAdapter
 from typing import List, Dict, Any, Optional, Tuple
 from ..models.entities import FaultElement, FaultType
 
@@ -15,7 +16,9 @@ class EntityRecognizer:
     def __init__(self, 
                  service_url: str = "http://127.0.0.1:50003/extract_entities",
                  timeout: int = 10,
-                 fallback_enabled: bool = True):
+                 fallback_enabled: bool = True,
+                 batch_service_url: Optional[str] = None,
+                 pool_size: int = 32):
         """
         初始化实体识别器
         
@@ -23,12 +26,23 @@ class EntityRecognizer:
             service_url: 实体识别服务的URL
             timeout: 请求超时时间（秒）
             fallback_enabled: 是否启用回退模式（使用规则匹配）
+            batch_service_url: 批量实体识别接口URL，未配置时逐条调用 service_url
+            pool_size: HTTP连接池大小，应不小于并发调用的线程数
         """
         self.service_url = service_url
+        self.batch_service_url = batch_service_url
+        # 批量接口是否可用，接口不存在（404/405）时改为逐条请求
+        self.batch_available = batch_service_url is not None
         self.timeout = timeout
         self.fallback_enabled = fallback_enabled
         self.logger = logging.getLogger(__name__)
         
+        # 复用HTTP连接（keep-alive），避免每次请求重新建立TCP连接
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        
         # 测试服务连接
         self.service_available = self._test_service()
         
@@ -75,7 +89,7 @@ class EntityRecognizer:
         """测试实体识别服务是否可用"""
         try:
             test_data = {"text": "测试"}
-            response = requests.post(
+            response = self._session.post(
                 self.service_url, 
                 json=test_data, 
                 timeout=self.timeout
@@ -107,6 +121,43 @@ class EntityRecognizer:
                 self.logger.error(f"NER服务调用失败: {e}")
                 self.service_available = False
         
+        return self._complete_elements(text, elements)
+    
+    def extract_entities_batch(self, texts: List[str]) -> List[List[FaultElement]]:
+        """
+        批量提取实体，所有文本通过一次请求发送给NER服务
+        
+        Args:
+            texts: 输入文本列表
+            
+        Returns:
+            与 texts 一一对应的故障元素列表
+        """
+        ner_results = [[] for _ in texts]
+        
+        if self.service_available and texts:
+            if not self.batch_available:
+                return [self.extract_entities(text) for text in texts]
+            try:
+                ner_results = self._extract_batch_with_ner_service(texts)
+                self.logger.info(f"NER服务批量提取了 {len(texts)} 条文本")
+            except Exception as e:
+                # 只有接口不存在时才永久停用批量接口，超时等临时错误只影响本次调用
+                status_code = getattr(getattr(e, 'response', None), 'status_code', None)
+                if status_code in (404, 405):
+                    self.logger.warning(f"批量实体识别接口不存在，改为逐条调用: {e}")
+                    self.batch_available = False
+                else:
+                    self.logger.warning(f"批量实体识别失败，本次改为逐条调用: {e}")
+                return [self.extract_entities(text) for text in texts]
+        
+        return [
+            self._complete_elements(text, elements)
+            for text, elements in zip(texts, ner_results)
+        ]
+    
+    def _complete_elements(self, text: str, elements: List[FaultElement]) -> List[FaultElement]:
+        """用规则匹配补充NER结果并做后处理"""
         # 如果NER服务不可用或提取结果较少，使用规则匹配作为补充
         if not self.service_available or len(elements) < 3:
             fallback_elements = self._extract_with_rules(text)
@@ -123,7 +174,7 @@ class EntityRecognizer:
         """使用NER服务提取实体"""
         try:
             data = {"text": text}
-            response = requests.post(
+            response = self._session.post(
                 self.service_url, 
                 json=data, 
                 timeout=self.timeout
@@ -131,34 +182,54 @@ class EntityRecognizer:
             response.raise_for_status()
             
             result = response.json()
-            elements = []
-            
-            # 解析NER服务返回的结果
-            # 格式: {'entities': [{'end_pos': 7, 'name': '刀链', 'start_pos': 5, 'type': '部件单元'},...]}
-            if 'entities' in result:
-                for entity in result['entities']:
-                    entity_text = entity.get('name', '')  # 实体名称
-                    entity_type = entity.get('type', '')   # 实体类型（中文）
-                    start_pos = entity.get('start_pos', 0) # 开始位置
-                    confidence = 0.9  # NER服务的置信度较高
-                    
-                    # 映射实体类型到故障类型
-                    fault_type = self.entity_type_mapping.get(entity_type, FaultType.PHENOMENON)
-                    
-                    element = FaultElement(
-                        content=entity_text,
-                        element_type=fault_type,
-                        confidence=confidence,
-                        position=start_pos
-                    )
-                    elements.append(element)
-            
-            return elements
+            return self._parse_entities(result)
             
         except Exception as e:
             self.logger.error(f"NER服务调用异常: {e}")
             raise
     
+    def _extract_batch_with_ner_service(self, texts: List[str]) -> List[List[FaultElement]]:
+        """使用NER服务的批量接口提取实体"""
+        response = self._session.post(
+            self.batch_service_url,
+            json={"texts": texts},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        
+        # 格式: {'results': [{'entities': [...]}, ...]}，顺序与 texts 一致
+        results = response.json().get('results', [])
+        if len(results) != len(texts):
+            raise ValueError(f"批量接口返回 {len(results)} 条结果，期望 {len(texts)} 条")
+        
+        return [self._parse_entities(result) for result in results]
+    
+    def _parse_entities(self, result: Dict[str, Any]) -> List[FaultElement]:
+        """解析NER服务返回的单条结果"""
+        elements = []
+        
+        # 解析NER服务返回的结果
+        # 格式: {'entities': [{'end_pos': 7, 'name': '刀链', 'start_pos': 5, 'type': '部件单元'},...]}
+        if 'entities' in result:
+            for entity in result['entities']:
+                entity_text = entity.get('name', '')  # 实体名称
+                entity_type = entity.get('type', '')   # 实体类型（中文）
+                start_pos = entity.get('start_pos', 0) # 开始位置
+                confidence = 0.9  # NER服务的置信度较高
+                
+                # 映射实体类型到故障类型
+                fault_type = self.entity_type_mapping.get(entity_type, FaultType.PHENOMENON)
+                
+                element = FaultElement(
+                    content=entity_text,
+                    element_type=fault_type,
+                    confidence=confidence,
+                    position=start_pos
+                )
+                elements.append(element)
+        
+        return elements
+    
     def _extract_with_rules(self, text: str) -> List[FaultElement]:
         """使用规则匹配提取实体（回退模式）"""
         import re
@@ -257,6 +328,7 @@ class EntityRecognizer:
         """获取服务状态"""
         return {
             "service_url": self.service_url,
+            "batch_service_url": self.batch_service_url if self.batch_available else None,
             "service_available": self.service_available,
             "fallback_enabled": self.fallback_enabled,
             "entity_types_supported": list(self.entity_type_mapping.keys())
@@ -270,4 +342,8 @@ class EntityRecognizer:
     def refresh_service_status(self):
         """刷新服务状态"""
         self.service_available = self._test_service()
-        return self.service_available
\ No newline at end of file
+        return self.service_available
+    
+    def close(self):
+        """关闭HTTP连接池"""
+        self._session.close()
@@ -20,7 +20,8 @@ class TextProcessor:
                  stopwords_path: str = None, 
                  custom_dict_path: str = None,
                  entity_service_url: str = "http://127.0.0.1:50003/extract_entities",
-                 enable_entity_recognition: bool = True):
+                 enable_entity_recognition: bool = True,
+                 entity_batch_service_url: str = None):
         """
         初始化文本处理器
         
@@ -29,6 +30,7 @@ class TextProcessor:
             custom_dict_path: 自定义词典文件路径
             entity_service_url: 实体识别服务URL
             enable_entity_recognition: 是否启用实体识别
+            entity_batch_service_url: 批量实体识别接口URL（服务提供时才配置）
         """
         self.stopwords = self._load_stopwords(stopwords_path)
         
@@ -42,7 +44,8 @@ class TextProcessor:
                 self.entity_recognizer = EntityRecognizer(
                     service_url=entity_service_url,
                     timeout=10,
-                    fallback_enabled=True
+                    fallback_enabled=True,
+                    batch_service_url=entity_batch_service_url
                 )
             except Exception as e:
                 print(f"实体识别器初始化失败，使用规则匹配: {e}")
@@ -164,6 +167,24 @@ class TextProcessor:
         
         return elements
     
+    def extract_fault_elements_batch(self, texts: List[str]) -> List[List[FaultElement]]:
+        """
+        批量提取故障元素，实体识别服务只请求一次
+        
+        Args:
+            texts: 文本列表
+            
+        Returns:
+            与 texts 一一对应的故障元素列表
+        """
+        if self.enable_entity_recognition and self.entity_recognizer:
+            try:
+                return self.entity_recognizer.extract_entities_batch(texts)
+            except Exception as e:
+                print(f"批量实体识别失败，使用规则匹配: {e}")
+        
+        return [self._extract_with_rules(text) for text in texts]
+    
     def _extract_with_rules(self, text: str) -> List[FaultElement]:
         """使用规则匹配提取故障元素（原有方法）"""
         elements = []
@@ -322,4 +343,9 @@ class TextProcessor:
         """刷新实体识别服务状态"""
         if self.entity_recognizer:
             return self.entity_recognizer.refresh_service_status()
-        return False
\ No newline at end of file
+        return False
+    
+    def close(self):
+        """释放实体识别服务的连接"""
+        if self.entity_recognizer:
+            self.entity_recognizer.close()
\ No newline at end of file
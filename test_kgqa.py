@@ -2,10 +2,15 @@
 KGQA框架基本功能测试
 """
 
+import re
 import sys
+import time
 import logging
 from kgqa_framework.utils.text_processor import TextProcessor
-from kgqa_framework.models.entities import FaultType, FaultElement, EquipmentInfo, UserQuery
+from kgqa_framework.models.entities import FaultType, FaultElement, EquipmentInfo, UserQuery, SimilarCase
+from kgqa_framework.utils.cache import TTLCache
+from kgqa_framework.core.kg_engine import KnowledgeGraphEngine
+from kgqa_framework.core.similarity_matcher import SimilarityMatcher
 
 def test_text_processor():
     """测试文本处理器"""
@@ -83,6 +88,346 @@ def test_entities():
     
     return True
 
+def test_ttl_cache():
+    """测试TTL缓存（不依赖外部数据库）"""
+    print("\n" + "=" * 50)
+    print("测试TTL缓存")
+    print("=" * 50)
+    
+    # 过期：条目超过存活时间后视为未命中并被删除
+    cache = TTLCache(maxsize=10, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.get("a", "默认值") == "默认值"
+    assert cache.get("b") == 2
+    assert len(cache) == 1
+    print("✓ 过期条目不再返回，单条目ttl生效")
+    
+    # LRU淘汰：超出 maxsize 时淘汰最久未使用的条目
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")          # a 变为最近使用
+    cache.set("c", 3)       # 淘汰 b
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert len(cache) == 2
+    print("✓ 超出容量时淘汰最久未使用的条目")
+    
+    # 清空
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get("a") is None
+    print("✓ 清空缓存")
+    
+    return True
+
+class _StubKGEngine(KnowledgeGraphEngine):
+    """
+    用固定规则代替Neo4j查询的图谱引擎（不连接数据库）
+    
+    操作 X 关联现象 "X现象"，现象 P 的原因为 "P原因"；记录每次查询的参数，
+    并按与输入相反的顺序返回记录，检验结果按 owner 对应回输入。
+    """
+    
+    def __init__(self, *args, **kwargs):
+        self.read_calls = []
+        kwargs["preload_cause_map"] = False
+        super().__init__(*args, **kwargs)
+    
+    def _ensure_fulltext_index(self):
+        return False
+    
+    def _read(self, query, **params):
+        self.read_calls.append(params)
+        records = []
+        for q in params.get("queries", []):
+            operation_phenomena = [
+                {"phenomenon": op + "现象", "confidence": 0.9, "related_operation": op}
+                for op in q["operations"]
+            ]
+            causes = [
+                {"step": 2, "cause": r["phenomenon"] + "原因", "confidence": 0.8,
+                 "related_phenomenon": r["phenomenon"]}
+                for r in operation_phenomena
+            ] + [
+                {"step": 1, "cause": p + "原因", "confidence": 1.0, "related_phenomenon": p}
+                for p in q["phenomena"]
+            ]
+            records.append({
+                "owner": q["owner"],
+                "operation_phenomena": operation_phenomena,
+                "location_phenomena": [],
+                "alarm_phenomena": [],
+                "causes": causes
+            })
+        return records[::-1]
+
+def _make_query(description, related_phenomena=None):
+    return UserQuery(
+        equipment_info=EquipmentInfo(brand="发那科", model=None, error_code=None),
+        fault_description=description,
+        related_phenomena=related_phenomena or [],
+        user_feedback=None
+    )
+
+def _fulltext_tokens(text):
+    """近似全文索引默认分析器：连续的字母、数字为一个词，每个汉字单独成词"""
+    return re.findall(r"[\u4e00-\u9fff]|[a-z0-9]+", text.lower())
+
+def _phrase_matches(title, phrase):
+    title_tokens = _fulltext_tokens(title)
+    phrase_tokens = _fulltext_tokens(phrase)
+    n = len(phrase_tokens)
+    return any(title_tokens[i:i + n] == phrase_tokens for i in range(len(title_tokens) - n + 1))
+
+def test_fulltext_lookup_matches_contains():
+    """测试全文索引查找与 CONTAINS 子串匹配的结果一致（不依赖外部数据库）"""
+    print("\n" + "=" * 50)
+    print("测试全文索引查找")
+    print("=" * 50)
+    
+    engine = _StubKGEngine("bolt://localhost:7687", "neo4j", "password")
+    engine._fulltext_ready = True
+    
+    titles = ["ALM401", "ALM4010", "SV-401", "主轴异响", "主轴异响报警", "刀库ALM401报警", "刀链不到位"]
+    terms = ["401", "ALM40", "V-401", "主轴异响", "异响", "刀库", "ALM401报警", "不到位"]
+    
+    # 字母数字词的短语查询找不到 title 中间的子串，这类词不能走索引
+    assert not _phrase_matches("ALM401", "401")
+    
+    params = engine._lookup_params("alarms", "alarm", terms)
+    assert params["alarms"] == terms
+    assert [item["term"] for item in params["alarm_items"]] == ["主轴异响", "异响", "刀库", "不到位"]
+    assert params["alarm_scan"] == ["401", "ALM40", "V-401", "ALM401报警"]
+    
+    # 索引候选 + CONTAINS 过滤，加上扫描的词，与直接 CONTAINS 的结果相同
+    matched = set()
+    for item in params["alarm_items"]:
+        matched |= {(item["term"], t) for t in titles
+                    if _phrase_matches(t, item["phrase"]) and item["term"] in t}
+    for term in params["alarm_scan"]:
+        matched |= {(term, t) for t in titles if term in t}
+    expected = {(term, t) for term in terms for t in titles if term in t}
+    assert matched == expected, matched ^ expected
+    print("✓ 全文索引查找与 CONTAINS 结果一致")
+    
+    # 索引不可用时全部扫描
+    engine._fulltext_ready = False
+    params = engine._lookup_params("alarms", "alarm", terms)
+    assert params["alarm_items"] == [] and params["alarm_scan"] == terms
+    print("✓ 索引不可用时全部使用 CONTAINS")
+    
+    engine.close()
+    return True
+
+def test_reasoning_chains_batch():
+    """测试批量推理链（不依赖外部数据库）"""
+    print("\n" + "=" * 50)
+    print("测试批量推理链")
+    print("=" * 50)
+    
+    engine = _StubKGEngine("bolt://localhost:7687", "neo4j", "password")
+    
+    def element(content, element_type):
+        return FaultElement(content=content, element_type=element_type, confidence=0.9, position=0)
+    
+    inputs = [
+        [element("主轴异响", FaultType.PHENOMENON), element("主轴异响", FaultType.PHENOMENON),
+         element("自动换刀", FaultType.OPERATION), element("轴承磨损", FaultType.CAUSE)],
+        [],
+        [element("刀库报警", FaultType.PHENOMENON)],
+        [element("自动换刀", FaultType.OPERATION), element("主轴异响", FaultType.PHENOMENON)],
+    ]
+    
+    # 分组：按类型去重排序，原因类型的元素不参与推理
+    groups = engine._group_fault_elements(inputs[0])
+    assert groups == (["自动换刀"], ["主轴异响"], [], []), groups
+    print("✓ 故障元素按类型分组并去重")
+    
+    results = engine.execute_reasoning_chains(inputs)
+    
+    # 相同的输入只查询一次，所有输入合并为一次查询
+    assert len(engine.read_calls) == 1
+    assert len(engine.read_calls[0]["queries"]) == 2
+    print("✓ 未命中缓存的输入合并为一次查询")
+    
+    # 结果按输入顺序返回，原因按推理步骤排序
+    assert len(results) == len(inputs)
+    assert [c["cause"] for c in results[0]["causes"]] == ["主轴异响原因", "自动换刀现象原因"]
+    assert results[1]["causes"] == [] and results[1]["related_phenomena"] == []
+    assert [c["cause"] for c in results[2]["causes"]] == ["刀库报警原因"]
+    assert results[3] == results[0] and results[3] is not results[0]
+    print("✓ 结果按输入顺序对应，重复输入得到相同结果")
+    
+    # 单条推理与批量结果一致，且命中缓存
+    assert engine.execute_reasoning_chain(inputs[2]) == results[2]
+    assert len(engine.read_calls) == 1
+    print("✓ 单条推理与批量结果一致")
+    
+    engine.close()
+    
+    # 批量查询失败时逐条重试，只有出错的输入得到空结果
+    engine = _StubKGEngine("bolt://localhost:7687", "neo4j", "password")
+    stub_read = engine._read
+    
+    def failing_read(query, **params):
+        if any("坏数据" in q["phenomena"] for q in params["queries"]):
+            raise RuntimeError("查询失败")
+        return stub_read(query, **params)
+    
+    engine._read = failing_read
+    results = engine.execute_reasoning_chains([
+        [element("主轴异响", FaultType.PHENOMENON)],
+        [element("坏数据", FaultType.PHENOMENON)],
+        [element("刀库报警", FaultType.PHENOMENON)],
+    ])
+    assert [c["cause"] for c in results[0]["causes"]] == ["主轴异响原因"]
+    assert results[1]["causes"] == []
+    assert [c["cause"] for c in results[2]["causes"]] == ["刀库报警原因"]
+    print("✓ 批量查询失败时逐条重试，其他输入不受影响")
+    
+    engine.close()
+    return True
+
+def test_cause_map_lookup():
+    """测试内存中的 现象->原因 映射（不依赖外部数据库）"""
+    print("\n" + "=" * 50)
+    print("测试现象原因映射")
+    print("=" * 50)
+    
+    engine = _StubKGEngine("bolt://localhost:7687", "neo4j", "password")
+    
+    # 映射未加载时查询数据库
+    engine.get_fault_causes_by_phenomena(["主轴异响"])
+    assert len(engine.read_calls) == 1
+    
+    # 映射加载后即为完整答案：映射中没有的现象没有原因，不再查询数据库
+    engine._direct_xy = {"主轴异响": ("轴承磨损", "润滑不良"), "主轴振动": ("轴承磨损",)}
+    engine._xx = {"主轴异响": ("主轴振动",)}
+    engine._cause_map_loaded = True
+    engine.read_calls.clear()
+    
+    causes = engine.get_fault_causes_by_phenomena(["主轴异响", "不在图谱中的现象"])
+    assert [(c["cause"], c["confidence"]) for c in causes] == [
+        ("轴承磨损", 1.0), ("润滑不良", 1.0), ("轴承磨损", 0.8)
+    ]
+    assert engine.get_fault_causes_by_phenomena(["不在图谱中的现象"]) == []
+    
+    element = FaultElement(content="不在图谱中的现象", element_type=FaultType.PHENOMENON,
+                           confidence=0.9, position=0)
+    assert engine.execute_reasoning_chain([element])["causes"] == []
+    assert engine.read_calls == []
+    print("✓ 映射加载后只查内存，映射中没有的现象没有原因")
+    
+    engine.close()
+    return True
+
+def test_similar_cases_batch():
+    """测试批量相似案例匹配（不依赖外部数据库）"""
+    print("\n" + "=" * 50)
+    print("测试批量相似案例匹配")
+    print("=" * 50)
+    
+    matcher = SimilarityMatcher(text_processor=TextProcessor(enable_entity_recognition=False))
+    matcher.add_cases_batch([
+        SimilarCase(case_id="case_0", description="主轴 异响 振动", similarity=0.0,
+                    elements=[], solution="更换主轴轴承"),
+        SimilarCase(case_id="case_1", description="刀库 换刀 不到位", similarity=0.0,
+                    elements=[], solution="调整刀库定位"),
+        SimilarCase(case_id="case_2", description="液压 压力 不稳定", similarity=0.0,
+                    elements=[], solution="检查液压泵"),
+    ])
+    
+    queries = [
+        _make_query("主轴 异响"),
+        _make_query("刀库 换刀 卡住", ["不到位"]),
+        _make_query("液压 压力 波动"),
+        _make_query("主轴 异响"),
+    ]
+    batch = matcher.find_similar_cases_batch(queries, top_k=3, min_similarity=0.0)
+    
+    assert len(batch) == len(queries)
+    for query, cases in zip(queries, batch):
+        single = matcher.find_similar_cases(query, top_k=3, min_similarity=0.0)
+        assert [c.case_id for c in cases] == [c.case_id for c in single]
+        assert all(abs(a.similarity - b.similarity) < 1e-9 for a, b in zip(cases, single))
+        assert [c.similarity for c in cases] == sorted((c.similarity for c in cases), reverse=True)
+    assert [c.case_id for c in batch[0]] == [c.case_id for c in batch[3]]
+    assert matcher.find_similar_cases_batch([]) == []
+    print("✓ 批量匹配结果与逐条匹配一致")
+    
+    return True
+
+def test_analyze_faults_batch():
+    """测试批量故障分析（图谱查询使用桩实现，不依赖外部数据库）"""
+    print("\n" + "=" * 50)
+    print("测试批量故障分析")
+    print("=" * 50)
+    
+    from kgqa_framework.core import fault_analyzer as fault_analyzer_module
+    
+    original_engine = fault_analyzer_module.KnowledgeGraphEngine
+    fault_analyzer_module.KnowledgeGraphEngine = _StubKGEngine
+    try:
+        analyzer = fault_analyzer_module.FaultAnalyzer(
+            neo4j_uri="bolt://localhost:7687",
+            neo4j_username="neo4j",
+            neo4j_password="password",
+            enable_web_search=False,
+            enable_entity_recognition=False
+        )
+    finally:
+        fault_analyzer_module.KnowledgeGraphEngine = original_engine
+    
+    try:
+        queries = [
+            _make_query("主轴启动后出现异响", ["主轴振动"]),
+            _make_query("刀库停止运转，出现报警"),
+            _make_query("主轴启动后出现异响", ["主轴振动"]),
+        ]
+        results = analyzer.analyze_faults(queries)
+        
+        # 所有查询的图谱推理合并为一次查询
+        assert len(analyzer.kg_engine.read_calls) == 1
+        assert len(results) == len(queries)
+        assert results[0].causes == results[2].causes and results[0] is not results[2]
+        assert results[0].causes != results[1].causes
+        print("✓ 批量分析合并图谱查询，重复查询得到相同结果")
+        
+        # 与逐条分析（清空缓存后）的结果一致，说明结果按输入顺序对应
+        analyzer.clear_result_cache()
+        analyzer.kg_engine.invalidate()
+        for query, result in zip(queries, results):
+            single = analyzer.analyze_fault_from_query(query)
+            assert single.causes == result.causes
+            assert single.solutions == result.solutions
+        print("✓ 批量分析结果与逐条分析一致")
+        
+        # 批量分析失败时逐条重试，只有出错的查询得到错误结果
+        analyzer.clear_result_cache()
+        original_clean = analyzer.text_processor.clean_text
+        
+        def failing_clean(text):
+            if "坏数据" in text:
+                raise RuntimeError("处理失败")
+            return original_clean(text)
+        
+        analyzer.text_processor.clean_text = failing_clean
+        mixed = analyzer.analyze_faults([queries[0], _make_query("坏数据"), queries[1]])
+        analyzer.text_processor.clean_text = original_clean
+        assert mixed[0].causes == results[0].causes
+        assert mixed[1].causes == ["分析过程出现错误"]
+        assert mixed[2].causes == results[1].causes
+        print("✓ 批量分析失败时逐条重试，其他查询不受影响")
+    finally:
+        analyzer.close()
+    
+    return True
+
 def test_mock_analysis():
     """模拟故障分析流程（不依赖外部数据库）"""
     print("\n" + "=" * 50)
@@ -206,6 +551,12 @@ def main():
     tests = [
         ("文本处理器", test_text_processor),
         ("实体模型", test_entities),
+        ("TTL缓存", test_ttl_cache),
+        ("全文索引查找", test_fulltext_lookup_matches_contains),
+        ("批量推理链", test_reasoning_chains_batch),
+        ("现象原因映射", test_cause_map_lookup),
+        ("批量相似案例匹配", test_similar_cases_batch),
+        ("批量故障分析", test_analyze_faults_batch),
         ("模拟分析", test_mock_analysis),
         ("集成测试", test_integration),
     ]